@@ -23,6 +23,37 @@ from tigres.utils import TigresException
 __all__ = ['plugin', 'utils']
 
 
+# Plugin instances, by execution plugin name
+_plugins = {}
+
+
+def get_plugin(execution):
+    """
+    Get the execution plugin without loading it to the tigres.core.execution
+    namespace.  Plugins are created once and reused.
+
+    :param execution: plugin to get
+    :return: ExecutionPluginBase
+    """
+    if not execution:
+        raise TigresException(
+            "{}.{} - there is not execution to load".format(__name__,
+                                                            get_plugin.__name__))
+    plugin = _plugins.get(execution)
+    if plugin is None:
+        # import execution plugin
+        execution_split = execution.split('.')
+        module_name = ".".join(execution_split[0:-1])
+        module = import_module(module_name)
+        plugin_module = getattr(module, execution_split[-1])
+        if not issubclass(plugin_module, ExecutionPluginBase):
+            raise TigresException(
+                "{} is not a valid plugin. Must inherit from {}".format(execution,
+                                                                        ExecutionPluginBase))
+        plugin = _plugins[execution] = plugin_module(execution)
+    return plugin
+
+
 def load_plugin(execution):
     """
     Loads the execution plugin to tigres.core.execution namespace.
@@ -34,16 +65,17 @@ def load_plugin(execution):
         raise TigresException(
             "{}.{} - there is not execution to load".format(__name__,
                                                             load_plugin.__name__))
-        # import execution plugin
-    execution_split = execution.split('.')
-    module_name = ".".join(execution_split[0:-1])
-    module = import_module(module_name)
-    plugin_module = getattr(module, execution_split[-1])
-    if not issubclass(plugin_module, ExecutionPluginBase):
-        raise TigresException(
-            "{} is not a valid plugin. Must inherit from {}".format(execution,
-                                                                    ExecutionPluginBase))
-    sys.modules['tigres.core.execution.engine'] = plugin_module(execution)
+    plugin = get_plugin(execution)
+    sys.modules['tigres.core.execution.engine'] = plugin
     sys.modules[__name__].engine = sys.modules['tigres.core.execution.engine']
-    return plugin_module
+    return type(plugin)
 
+
+def shutdown_plugins():
+    """
+    Shuts down every execution plugin that has been loaded.
+
+    :return: None
+    """
+    for plugin in list(_plugins.values()):
+        plugin.shutdown()
@@ -32,7 +32,11 @@ class ExecutionPluginBase(types.ModuleType,
     @classmethod
     def execute(cls, name, task, input_values, execution_data):
         if task.env:
-            execution_data['env'].update(task.env)
+            # The template environment is shared, copy before adding the
+            # task environment
+            task_env = dict(execution_data['env'])
+            task_env.update(task.env)
+            execution_data['env'] = task_env
         if 'FUNCTION' == task.task_type:
             return cls.execute_function(name, task, input_values,
                                         execution_data)
@@ -73,6 +77,13 @@ class ExecutionPluginBase(types.ModuleType,
         """
         raise NotImplementedError
 
+    @classmethod
+    def shutdown(cls):
+        """ Releases any resources held by the plugin (e.g. worker threads).
+        Called when the Tigres program ends.
+        """
+        pass
+
     @classmethod
     @abstractmethod
     def parallel(cls, parallel_work, run_fn):
@@ -19,11 +19,62 @@ Classes
 import os
 import socket
 import subprocess
-import uuid
 
-from tigres.core.utils import get_free_port
+try:
+    from subprocess import DEVNULL
+except ImportError:
+    # Python 2
+    DEVNULL = open(os.devnull, 'wb')
+
+from tigres.core.utils import get_free_port, get_cpu_count
 from tigres.core.execution.plugin.local import ExecutionPluginLocalBase
 from tigres.core.execution.utils import TaskServer, TaskClient
+# Import from the log module directly: tigres.core.monitoring imports the
+# execution plugins (through the program state) while it initializes
+from tigres.core.monitoring.common import Level
+from tigres.core.monitoring.log import write as log_write
+from tigres.utils import State, TaskFailure, get_random_id
+
+# Host name of the Tigres program, where the TaskServer runs
+_HOSTNAME = socket.gethostname()
+
+# ssh options for launching the clients. Connections to a host are shared
+# through a control master that stays open between templates, so later
+# templates skip the connection and authentication to that host.
+SSH_OPTIONS = ["-o", "StrictHostKeyChecking=no",
+               "-o", "ControlMaster=auto",
+               "-o", "ControlPath=~/.ssh/tigres-%r@%h:%p",
+               "-o", "ControlPersist=60"]
+
+# Prefix of the environment variables passed to the tigres-client program
+CLIENT_ENV_PREFIX = 'OTIGRES_'
+
+
+def _client_hosts():
+    """ The hosts to run the Tigres clients on, from `TIGRES_HOSTS`
+
+    :return: host names, empty if no hosts are set
+    :rtype: list
+    """
+    hosts = os.environ.get('TIGRES_HOSTS')
+    if not hosts:
+        return []
+    return [host for host in (h.strip() for h in hosts.split(',')) if host]
+
+
+def _client_env():
+    """ The exports for the environment variables passed to tigres-client
+
+    The environment is read on every call, since it may change between
+    templates.
+
+    :return: export statements for the `OTIGRES_` variables with the prefix removed
+    :rtype: str
+    """
+    prefix_len = len(CLIENT_ENV_PREFIX)
+    return " ".join("export {}={};".format(k[prefix_len:], v)
+                    for k, v in os.environ.items()
+                    if k.startswith(CLIENT_ENV_PREFIX))
 
 
 class ExecutionPluginDistributeProcess(ExecutionPluginLocalBase):
@@ -31,6 +82,49 @@ class ExecutionPluginDistributeProcess(ExecutionPluginLocalBase):
     Execution plugin for distributing processes.
     """
 
+    @staticmethod
+    def _run_local(work, run_fn):
+        """ Run the work in the Tigres program. Failures are recorded
+        in the work as they are by the `TaskClient`
+
+        :param work: the work to run
+        :type work: tigres.core.state.WorkUnit
+        :param run_fn: function to run the work with
+        """
+        try:
+            run_fn(work)
+        except Exception as err:
+            work.results = TaskFailure(
+                "Task Execution Failure for {}".format(work.name), error=err)
+            work.state = State.FAIL
+
+    @staticmethod
+    def _launch_client(host, command):
+        """ Start a Tigres client on the given host with ssh
+
+        :param host: the host to run the client on
+        :param command: the client command to run on the host
+        :return: the ssh process or None if it failed to start
+        :rtype: subprocess.Popen or None
+        """
+        try:
+            # Descriptors are not inheritable by default on Python 3 (and
+            # close_fds is already False on Python 2), so skip closing every
+            # descriptor in the child. This also allows the posix_spawn path.
+            # The client output is never read, so it is discarded rather
+            # than left to fill a pipe and block the client.
+            program = subprocess.Popen(
+                ["ssh"] + SSH_OPTIONS + [host, command],
+                stderr=DEVNULL, stdout=DEVNULL, close_fds=False)
+        except Exception as err:
+            log_write(Level.WARN, "distribute", message="Cannot start a Tigres client on "
+                                           "{}: {}".format(host, err))
+            return None
+        if program.poll():
+            # ssh has already exited with an error
+            return None
+        return program
+
     @classmethod
     def parallel(cls, parallel_work, run_fn):
         """ Executes in parallel across multiple hosts.
@@ -40,7 +134,8 @@ class ExecutionPluginDistributeProcess(ExecutionPluginLocalBase):
         `TaskServer` is run in the Tigres program.  `TigresClient`s which run workers
         that consume the tasks from the `TaskServer` queue are run on the
         specified hosts. If no host machines are specified the `TaskServer` and `TaskClients`
-         will be run on the local machine.
+         will be run on the local machine. A single task with no host machines
+         is run in the Tigres program without a `TaskServer`.
 
         Environment variables:
 
@@ -54,60 +149,49 @@ class ExecutionPluginDistributeProcess(ExecutionPluginLocalBase):
         :type parallel_work: tigres.core.state.WorkParallel
         :param run_fn: function to state state with, it should take a WorkUnit as input
         """
-        secret_key = str(uuid.uuid4())
+        host_list = _client_hosts()
+
+        if not host_list and len(parallel_work) == 1:
+            # Nothing to distribute, skip the server, the client process
+            # and pickling the work
+            cls._run_local(parallel_work[0], run_fn)
+            return
+
+        secret_key = get_random_id()
 
         port = get_free_port()
-        task_server = TaskServer(parallel_work, host=socket.gethostname(),
+        task_server = TaskServer(parallel_work, host=_HOSTNAME,
                                  port=port, secret_key=secret_key)
 
         # Launch Client(s)
-        hosts = None
-        if 'TIGRES_HOSTS' in os.environ:
-            hosts = os.environ['TIGRES_HOSTS']
+        if not host_list:
+            # The client runs one worker process per usable CPU, but
+            # there is no use starting more workers than there are tasks
+            num_processes = min(get_cpu_count(), len(parallel_work))
 
-        if not hosts:
             def worker():
-                task_client = TaskClient(cls.execute, host=socket.gethostname(),
-                                     port=port, secret_key=secret_key)
-                task_client.run()
+                task_client = TaskClient(cls.execute, host=_HOSTNAME,
+                                         port=port, secret_key=secret_key)
+                task_client.run(num_processes)
 
             import multiprocessing
             task_client_process = multiprocessing.Process(target=worker)
             task_client_process.start()
-            if not task_client_process:
-                task_server.kill()
-                raise Exception("There were no Tigres Clients Started")
-            else:
-                task_server.join()
-                if task_client_process.is_alive():
-                        task_client_process.terminate()
+            # Stop waiting if the client dies before all results are in
+            task_server.join(is_alive=task_client_process.is_alive)
+            if task_client_process.is_alive():
+                task_client_process.terminate()
         else:
             programs = []
-            host_list = hosts.split(',')
-            env = " ".join(
-                ["export {}={};".format(k.replace('OTIGRES_', ''),
-                                        os.environ[k]) for k in os.environ if
-                 k.startswith('OTIGRES_')])
-            command = "bash --login -c '{} tigres-client {} {} {}'".format(env,
-                                                                           socket.gethostname(),
-                                                                           port,
-                                                                           secret_key)
+            env = _client_env()
+            command = "bash --login -c '{} tigres-client {} {} {}'".format(
+                env, _HOSTNAME, port, secret_key)
+            # Popen does not wait for ssh to connect, so every host is
+            # contacted at the same time
             for host in host_list:
-                program=None
-                try:
-                    program = subprocess.Popen(
-                        ["ssh", "-o", "StrictHostKeyChecking=no", host,
-                         command], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
-                    if not program.returncode:
-                        programs.append(program)
-                    else:
-                        if program.poll():
-                            program.terminate()
-                except Exception as err:
-                    # TODO log this
-                    program.terminate()
-                    programs.remove(program)
-                    print(err)
+                program = cls._launch_client(host, command)
+                if program is not None:
+                    programs.append(program)
             if not len(programs) > 0:
                 task_server.kill()
                 raise Exception("There were no Tigres Clients Started")
@@ -18,7 +18,6 @@ try:
     from subprocess import getstatusoutput
 except ImportError:
     from commands import getstatusoutput
-from copy import copy
 import os
 import re
 
@@ -139,7 +138,7 @@ except Exception as e:
         :return: dictionary of task outputs
         :rtype: dict, one list of output objects per task
         """
-        copy_parallel_work = copy(parallel_work)
+        copy_parallel_work = list(parallel_work)
         while len(copy_parallel_work) > 0:
 
             for work in copy_parallel_work:
@@ -12,13 +12,14 @@
 
 """
 from copy import copy
-import multiprocessing
 import os
+import threading
 
 from tigres.core.execution.utils import TaskThreadExecution, \
-    TaskProcessExecution
+    TaskProcessExecution, TaskThreadPool
 from tigres.core.execution.plugin import ExecutionPluginBase
 from tigres.core.execution.utils import create_executable_command, run_command
+from tigres.core.utils import get_cpu_count
 from tigres.utils import TigresException, State
 
 
@@ -151,19 +152,53 @@ class ExecutionPluginLocalThread(ExecutionPluginLocalBase):
     """
     Plugin for local (threaded) Tigres Execution
 
+    The threads are started by the first parallel template and reused
+    until the program ends.
     """
 
+    _thread_pool = None
+    _thread_pool_lock = threading.Lock()
+
     @classmethod
     def parallel(cls, parallel_work, run_fn):
         """ Executes in parallel.
         Shared by parallel, split and merge templates
 
+        :param parallel_work: The parallel state object to execute.
+        :type parallel_work: tigres.core.state.WorkParallel
+        :param run_fn: function to state state with, it should take a WorkUnit as input
+        """
+        with cls._thread_pool_lock:
+            if cls._thread_pool is None:
+                cls._thread_pool = TaskThreadPool(get_cpu_count())
+            thread_pool = cls._thread_pool
+
+        if not thread_pool.in_pool():
+            thread_pool.map(run_fn, parallel_work)
+        else:
+            # A task is running a parallel template. Waiting on the pool from
+            # one of its own threads could deadlock, so use new threads.
+            cls._parallel_threads(parallel_work, run_fn)
+
+    @classmethod
+    def shutdown(cls):
+        """ Stops the threads started for parallel templates
+        """
+        with cls._thread_pool_lock:
+            if cls._thread_pool is not None:
+                cls._thread_pool.shutdown()
+                cls._thread_pool = None
+
+    @classmethod
+    def _parallel_threads(cls, parallel_work, run_fn):
+        """ Executes in parallel with newly started threads.
+
         :param parallel_work: The parallel state object to execute.
         :type parallel_work: tigres.core.state.WorkParallel
         :param run_fn: function to state state with, it should take a WorkUnit as input
         """
         # start threads
-        thread_count = multiprocessing.cpu_count()
+        thread_count = get_cpu_count()
         if thread_count > len(parallel_work):
             # there is no reason to have more threads than state
             thread_count = len(parallel_work)
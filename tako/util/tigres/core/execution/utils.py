@@ -20,6 +20,7 @@ Classes
 =========
  * :py:class:`TaskProcessExecution` - Launches multiple processes to execute Tigres tasks in parallel
  * :py:class:`TaskThreadExecution` - Launches multiple threads to execute Tigres tasks in parallel
+ * :py:class:`TaskThreadPool` - Long-lived threads that execute Tigres tasks in parallel
  * :py:class:`TaskServer` - Task Server for managing Tigres task execution across multiple hosts
  * :py:class:`TaskClient` - Task Client for executing Tigres tasks
 
@@ -45,7 +46,7 @@ from multiprocessing.managers import SyncManager
 import pickle
 import subprocess
 import threading
-from tigres.core.utils import get_str
+from tigres.core.utils import get_str, get_cpu_count
 
 try:
     from cloud import cloud
@@ -184,7 +185,7 @@ class TaskProcessExecution(object):
         """
         super(TaskProcessExecution, self).__init__()
         self._queue = multiprocessing.JoinableQueue(0)
-        self._num_processes = multiprocessing.cpu_count()
+        self._num_processes = get_cpu_count()
         len_work = len(work)
         if len_work < self._num_processes:
             self._num_processes = len_work
@@ -307,6 +308,101 @@ class TaskThreadExecution(object):
         self._queue.join()
 
 
+class _TaskBatch(object):
+    """ Counts down the tasks of one submission to a :class:`TaskThreadPool`
+    """
+    __slots__ = ('_count', '_condition')
+
+    def __init__(self, count):
+        self._count = count
+        self._condition = threading.Condition()
+
+    def task_done(self):
+        with self._condition:
+            self._count -= 1
+            if self._count <= 0:
+                self._condition.notify_all()
+
+    def wait(self):
+        """Blocks until all of the tasks in the batch are done
+        """
+        with self._condition:
+            while self._count > 0:
+                self._condition.wait()
+
+
+class TaskThreadPool(object):
+    """ Long-lived threads that execute Tigres tasks in parallel.
+
+    The threads are started once and reused by every parallel template,
+    instead of starting and joining new threads for each template.
+    """
+
+    def __init__(self, num_threads):
+        """Construct and start the threads.
+
+        :param num_threads: number of threads to run
+        """
+        super(TaskThreadPool, self).__init__()
+        self._queue = queue.Queue(0)
+        self._task_threads = []
+        for _ in range(num_threads):
+            t = threading.Thread(target=self._worker)
+            t.daemon = True
+            self._task_threads.append(t)
+            t.start()
+        self._thread_ids = frozenset(t.ident for t in self._task_threads)
+
+    def _worker(self):
+        while 1:
+            # get task
+            item = self._queue.get()
+            if item is None:
+                break  # stop on sentinel value, None
+
+            run_fn, work, batch = item
+            try:
+                run_fn(work)
+            except Exception as err:
+                work.results = TaskFailure(
+                    "Task Execution Failure for {}".format(work.name),
+                    error=err)
+                work.state = State.FAIL
+            finally:
+                # We are done with this task, for now
+                batch.task_done()
+
+    def in_pool(self):
+        """Is the current thread one of the pool threads?
+        """
+        return threading.current_thread().ident in self._thread_ids
+
+    def map(self, run_fn, work_list):
+        """Runs the function for each work item and blocks until all of them are done.
+
+        :param run_fn: the run function to use, it should take a WorkUnit as input
+        :param work_list: the work to run
+        """
+        batch = _TaskBatch(len(work_list))
+        for work in work_list:
+            self._queue.put((run_fn, work, batch))
+        batch.wait()
+
+    def shutdown(self):
+        """Stops the threads and waits for them to finish.
+        """
+        # Add sentinel value to stop each thread
+        for _ in self._task_threads:
+            self._queue.put(None)
+        for t in self._task_threads:
+            t.join()
+        self._task_threads = []
+
+
+# Seconds the TaskServer waits for a result before checking on the clients
+CLIENT_CHECK_INTERVAL = 1.0
+
+
 class TaskServerQueueManager(SyncManager):
     pass
 
@@ -323,8 +419,12 @@ class TaskServer(object):
         :param secret_key: the secret key shared by task and client
         :return:
         """
-        job_queue = multiprocessing.Queue()
-        result_queue = multiprocessing.Queue()
+        # The queues only live in the manager process and are reached
+        # through its proxies, so plain queues are enough. A
+        # multiprocessing queue would add a pipe and a feeder thread
+        # inside the manager for every message.
+        job_queue = queue.Queue()
+        result_queue = queue.Queue()
         self._address = (host, port)
         self._results = {}
         self._work = {}
@@ -348,17 +448,35 @@ class TaskServer(object):
                  w.execution_data))
             job_queue.put(serialized_work)
 
-    def join(self):
-        job_queue = self._manager.job_queue()
+    def join(self, is_alive=None):
+        """
+        Wait for the results of all of the work
+
+        :param is_alive: function that returns False once the clients have
+            stopped. If given the server stops waiting when no clients are left.
+        :raises: TigresException if the clients stopped before all results were sent
+        """
         result_queue = self._manager.result_queue()
 
-        # wait for the job_queue to be empty
+        # Wait for the run and finished messages of every task. The blocking
+        # get wakes as soon as a client sends a message instead of
+        # polling the queue
         while self._count_finished_work < (self._count_work*2):
-            while not result_queue.empty():
-                self._count_finished_work += 1
+            if is_alive is None:
                 work_results = result_queue.get()
-                self._work[work_results[0]].results = work_results[1][0]
-                self._work[work_results[0]].state = work_results[1][1]
+            else:
+                try:
+                    work_results = result_queue.get(
+                        timeout=CLIENT_CHECK_INTERVAL)
+                except queue.Empty:
+                    if not is_alive():
+                        self._manager.shutdown()
+                        raise TigresException(
+                            "The Tigres Clients stopped before all tasks finished")
+                    continue
+            self._count_finished_work += 1
+            self._work[work_results[0]].results = work_results[1][0]
+            self._work[work_results[0]].state = work_results[1][1]
 
         self._manager.shutdown()
 
@@ -417,12 +535,20 @@ class TaskClient(object):
                                                    'utf-8'))
         self._manager.connect()
 
-    def run(self):
+    def run(self, num_processes=None):
+        """
+        Run worker processes until the job queue is empty
+
+        :param num_processes: the number of worker processes (Default: one per usable CPU)
+        :type num_processes: int or None
+        """
         job_queue = self._manager.job_queue()
         result_queue = self._manager.result_queue()
 
+        if not num_processes:
+            num_processes = get_cpu_count()
         multiprocess_worker(job_queue, result_queue,
-                            multiprocessing.cpu_count(), self.worker, )
+                            num_processes, self.worker, )
 
 
 
@@ -23,29 +23,31 @@ Classes
 Functions
 =========
  * :func:`dot_execution` - create a DOT execution graph for the currently running Tigres Program
+ * :func:`dot_execution_write` - write a DOT execution graph to a file object
 
 
 .. moduleauthor:: Gilberto Pastorello <gzpastorello@lbl.gov>, Ryan Rodriguez <ryanrodriguez@lbl.gov>
 
 
 """
-from copy import copy
+import re
+
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 from tigres.core.monitoring import Program
 from tigres.core.state.work import WorkSequence, WorkParallel, WorkUnit, \
     CURRENT_INDEX
 
-
-try:
-    from itertools import tee, zip_longest
-except ImportError:
-    from itertools import tee, izip_longest
-
-    zip_longest = izip_longest
 from tigres.core.utils import TigresInternalException
 
 from tigres.utils import State, TigresException
 
+# Buffer size for writing DOT files
+DOT_BUFFER_SIZE = 1 << 16
+
 
 def dot_execution(path="."):
     """
@@ -59,25 +61,48 @@ def dot_execution(path="."):
     program = Program()
     filename = "{}/{}.dot".format(path, _friendly_name(program))
 
-    dot_string = dot_execution_string(program.root_work)
-
-    with open(filename, 'w') as f:
-        f.writelines(dot_string)
+    with open(filename, 'w', DOT_BUFFER_SIZE) as f:
+        dot_execution_write(f, program.root_work)
 
 
-def dot_execution_string(root_work):
-    templates = ''
-    edges = ''
-    task_nodes = ''
+def dot_execution_write(fp, root_work):
+    """
+    Writes the DOT execution graph for the given root state to a file object.
+    Each template is written as soon as it is generated. Only the nodes of
+    the current template and the ids for the edges, which follow the
+    templates, are kept in memory.
+
+    :param fp: file object to write to
+    :param root_work: the root state of the program
+    :type root_work: WorkSequence
+    :return: None
+    """
+    # The names are only cached while one graph is written, they are
+    # cleared when it is done so that the cache does not keep the names of
+    # every state in the program
+    _friendly_names.clear()
+    try:
+        edges = []
+        task_nodes = []
+
+        fp.write(DotFormat.OUT_GRAPH_HEAD.format(
+            workflow_name='"{}"'.format(root_work.name),
+            digraph_attrs=_DIGRAPH_ATTRS))
+        _dot_sequence(0, fp.write, edges, task_nodes, root_work)
+        fp.write("\n")
+        out_edge = DotFormat.OUT_EDGE_POSITIONAL
+        fp.writelines(out_edge % (p, c, attrs)
+                      for previous_ids, current_ids, attrs in edges
+                      for p in previous_ids for c in current_ids)
+        fp.write(DotFormat.OUT_GRAPH_TAIL)
+    finally:
+        _friendly_names.clear()
 
-    templates, edges, task_nodes = _dot_sequence(0, templates, edges,
-                                                 task_nodes, root_work)
 
-    return DotFormat.OUT_GRAPH.format(
-        workflow_name='"{}"'.format(root_work.name),
-        digraph_attrs=_f_attrs(DotFormat.DIGRAPH),
-        subgraphs=templates,
-        edges=edges)
+def dot_execution_string(root_work):
+    fp = StringIO()
+    dot_execution_write(fp, root_work)
+    return fp.getvalue()
 
 class GraphError(Exception):
     pass
@@ -94,6 +119,9 @@ class DirectedGraph(object):
 
     def __init__(self):
         self._vertices = {}
+        # (parent, child) pairs for constant time edge lookups, the
+        # children lists keep the order the edges were added in
+        self._edges = set()
         self._roots = []
 
     def add_vertex(self, vertex):
@@ -106,7 +134,8 @@ class DirectedGraph(object):
         # Check for vertex uniqueness
         vertex_exists = self.has_vertex(vertex)
         if not vertex_exists:
-            self._vertices[vertex] = None
+            # Every vertex has a list of children, empty for a leaf
+            self._vertices[vertex] = []
 
         if vertex_exists:
             raise GraphError("Node must be unique: %s" % vertex)
@@ -127,16 +156,15 @@ class DirectedGraph(object):
                 parent, child))
 
         # Check to see if vertices exist
-        vertices_exist = self.has_vertices([parent, child])
+        vertices_exist = self.has_vertex(parent) and self.has_vertex(child)
 
         # Check for edge uniqueness
         edge_exists = self.has_edge(parent, child)
 
         # Add the vertex if the edge is not there
         if not edge_exists and vertices_exist:
-            if self.is_leaf(parent):
-                self._vertices[parent] = []
             self._vertices[parent].append(child)
+            self._edges.add((parent, child))
 
         if edge_exists:
             raise GraphError("Edge must be unique: %s" % str((parent, child)))
@@ -151,20 +179,21 @@ class DirectedGraph(object):
 
     def has_vertices(self, vertices):
 
-        return len(set(vertices) & set(self._vertices.keys())) == len(vertices)
+        vertex_map = self._vertices
+        return all(v in vertex_map for v in vertices)
 
     def is_leaf(self, vertex):
         if not self.has_vertex(vertex):
             raise GraphError("Node is doesn't exist: %s" % vertex)
-        return self._vertices[vertex] is None
+        return not self._vertices[vertex]
 
     def has_edge(self, parent, child):
 
-        if not self.has_vertices([parent, child]):
+        if not (self.has_vertex(parent) and self.has_vertex(child)):
             raise GraphError(
                 "Not all vertices exist: %s" % str((parent, child)))
 
-        return child in self._vertices[parent]
+        return (parent, child) in self._edges
 
     @property
     def vertices(self):
@@ -211,9 +240,16 @@ class DotFormat(object):
     OUT_DEPENDENT_EDGE_TEMPLATE = "{id1}->{id2}[{attrs} + ltail=cluster_{id3} lhead = cluster_{id4}"
     OUT_EXECUTION_EDGE = "[ltail=cluster_{id2} lhead = cluster_{id2} color = black, style = dashed]"
     OUT_GRAPH = "digraph {workflow_name}\n{{\n{digraph_attrs}\n\n{subgraphs}\n{edges}}}"
+    # OUT_GRAPH split around the subgraphs and edges for writing them as they are generated
+    OUT_GRAPH_HEAD = "digraph {workflow_name}\n{{\n{digraph_attrs}\n\n"
+    OUT_GRAPH_TAIL = "}"
     OUT_SUBGRAPH = "subgraph {id} {{{label} {rank} {fontColor} {color}\n{nodes}\n}}\n"
     OUT_NODE = "{id} [{attrs}]\n"
     OUT_EDGE = "{id1} -> {id2} [{attrs}]\n"
+    # OUT_NODE and OUT_EDGE with positional fields, for the nodes and
+    # edges of every task
+    OUT_NODE_POSITIONAL = "%s [%s]\n"
+    OUT_EDGE_POSITIONAL = "%s -> %s [%s]\n"
 
     """Attributes for formatting JSON files
     """
@@ -222,37 +258,62 @@ class DotFormat(object):
     OUT_JSONEDGE = " "'"source"'":"'"{id1}"'", "'"target"'":"'"{id2}"'", "'"visible"'":"'"{id3}"'" "
     OUT_JSON = "[{id1}]"
 
+    # Task style for each state
+    TASK_STYLE = {
+        State.BLOCKED: TASK_NEW,
+        State.DONE: TASK_DONE,
+        State.FAIL: TASK_FAIL,
+        State.NEW: TASK_NEW,
+        State.RUN: TASK_NEW,
+        State.UNKNOWN: TASK_FAIL,
+    }
+
     @classmethod
     def task_style_by_state(cls, state):
-        style = {
-            State.BLOCKED: cls.TASK_NEW,
-            State.DONE: cls.TASK_DONE,
-            State.FAIL: cls.TASK_FAIL,
-            State.NEW: cls.TASK_NEW,
-            State.RUN: cls.TASK_NEW,
-            State.UNKNOWN: cls.TASK_FAIL,
-        }.get(state, None)
+        style = cls.TASK_STYLE.get(state, None)
         if style is None:
             raise TigresInternalException(
                 "Unknown state for graph formatting '{}'".format(state))
         return style
 
 
+# The formatted attributes shared by every edge
+_TASK_EDGE_ATTRS = _f_attrs(DotFormat.TASK_EDGE)
+
+# The formatted task style for each state
+_TASK_STYLE_ATTRS = dict((state, _f_attrs(style)) for state, style in
+                         DotFormat.TASK_STYLE.items())
+
+# The formatted graph attributes. The node defaults are part of the
+# "compound" value, so they are written in the graph attributes.
+_DIGRAPH_ATTRS = _f_attrs(DotFormat.DIGRAPH)
+
+
 def _dot_parallel(work_parallel, task_nodes):
     """
 
     :param work_parallel: parallel state to create DOT nodes for
     :type work_parallel: WorkParallel
-    :param task_nodes:
-    :return:
+    :param task_nodes: list of nodes for writing to the DOT file, the nodes are appended
+    :return: None
     """
     if not isinstance(work_parallel, WorkParallel):
         raise TigresException(
             "Error writing DOT file expecting a WorkParallel object not {}".format(
                 work_parallel.type))
+    # _dot_work inlined, the parallel state may have many tasks
+    style_by_state = _TASK_STYLE_ATTRS
+    friendly_name = _friendly_name
+    out_node = DotFormat.OUT_NODE_POSITIONAL
+    append = task_nodes.append
     for work in work_parallel:
-        task_nodes = _dot_work(work, task_nodes)
-    return task_nodes
+        state = work.state
+        style_attrs = style_by_state.get(state)
+        if style_attrs is None:
+            # Raises the unknown state error
+            DotFormat.task_style_by_state(state)
+        append(out_node % (friendly_name(work),
+                           '%s label="%s"' % (style_attrs, work.name)))
 
 
 def _dot_work(work, task_nodes):
@@ -260,15 +321,19 @@ def _dot_work(work, task_nodes):
 
     :param work: The leave not to write to the DOT file
     :type work: WorkUnit
-    :param task_nodes: string of nodes for writing to the DOT file
-    :return: modified string of nodes for writing to the DOT file
+    :param task_nodes: list of nodes for writing to the DOT file, the node is appended
+    :return: None
     """
 
-    node_attrs = DotFormat.task_style_by_state(work.state).copy()
-    node_attrs.update({'label': '"{}"'.format(work.name)})
-    task_nodes += DotFormat.OUT_NODE.format(id=_friendly_name(work),
-                                            attrs=_f_attrs(node_attrs))
-    return task_nodes
+    state = work.state
+    style_attrs = _TASK_STYLE_ATTRS.get(state)
+    if style_attrs is None:
+        # Raises the unknown state error
+        DotFormat.task_style_by_state(state)
+    # The label follows the style attributes
+    node_attrs = '%s label="%s"' % (style_attrs, work.name)
+    task_nodes.append(DotFormat.OUT_NODE_POSITIONAL % (_friendly_name(work),
+                                                       node_attrs))
 
 
 def _dot_template_edge(template_id, current_ids, edge_attrs, previous_ids,
@@ -279,139 +344,190 @@ def _dot_template_edge(template_id, current_ids, edge_attrs, previous_ids,
 
     :param template_id: The unique identifier of the template to add the edge for
     :param current_ids: the "to" vertices
-    :param edge_attrs: the edge attributes to use
+    :param edge_attrs: the edge attributes to add to the task edge attributes
     :param previous_ids: the "from" vertices
     :param previous_work: the previous state to build the edge form
     :return:
     """
     # template edge
-    if isinstance(previous_work, WorkUnit):
+    previous_type = type(previous_work)
+    if previous_type is WorkUnit:
         previous_ids.append(_friendly_name(previous_work))
-    elif isinstance(previous_work, WorkSequence):
+    elif previous_type is WorkSequence:
         previous_ids.append(_friendly_name(previous_work[CURRENT_INDEX]))
-    elif isinstance(previous_work, WorkParallel):
+    elif previous_type is WorkParallel:
         previous_ids.append(
-            _friendly_name(previous_work[int(len(previous_work) / 2)]))
+            _friendly_name(previous_work[len(previous_work) // 2]))
     edge_attrs['ltail'] = "cluster_{}".format(template_id - 1)
     edge_attrs['lhead'] = "cluster_{}".format(template_id)
     if len(current_ids) > 1:
-        current_ids = [current_ids[int(len(current_ids) / 2)]]
+        current_ids = [current_ids[len(current_ids) // 2]]
     return current_ids
 
 
-def _dot_edges(edges, work, template_id):
+def _dot_edges(edges, work, template_id, previous_work):
     """
     Generate the DOT incoming edges for the specified state
 
-    :param edges: string representing DOT edges
+    :param edges: list of `(previous ids, current ids, attributes)` for the
+        DOT edges, the edges of `work` are appended
     :param work: the state nodes to write incoming DOT edges for
     :type work: WorkBase
-    :return: modified string representing DOT edges
+    :param previous_work: the state previous to `work`, as found while
+        walking the sequence
+    :type previous_work: WorkBase or None
+    :return: None
     """
-    edge_attrs = copy(DotFormat.TASK_EDGE)
-    if work.previous:
-        # There is previous state, so we create add an edge.
-        previous_ids = []
-        current_ids = []
-        previous_work = work.previous
-
-        # determine the current state ids (where the edges are going to)
-        if isinstance(work, WorkParallel):
-            # The current state ids for the parallel is all the state in the list
-            for workp in work:
-                current_ids.append(_friendly_name(workp))
-        elif isinstance(work, WorkUnit):
-            # There is only one state id for an individual state unit
-            current_ids.append(_friendly_name(work))
-        elif isinstance(work, WorkSequence):
-            # The current state id for a sequences is the last item
-            current_ids.append(_friendly_name(work[CURRENT_INDEX]))
-
-        # Now, we determine the previous state id (where the edges are coming from)
-        work_parent = work.parent
-        previous_parent = previous_work.parent
-
-        if isinstance(previous_work, WorkParallel):
-            # We need to determine if the edge is between
-            # a WorkUnit or another template.
-            if isinstance(work, WorkUnit):
-                #If the previous work is a work unit then we want
-                # the edges from each task to point to the WorkUnit
-                for workp in previous_work:
-                    previous_ids.append(_friendly_name(workp))
-            else:
-                # The current and previous work are both templates.
-                # so their edges are  between the previous template
-                # and the current template.
-                current_ids = _dot_template_edge(template_id, current_ids,
-                                                 edge_attrs, previous_ids,
-                                                 previous_work)
-        elif isinstance(previous_work, WorkUnit):
-            # If the previous state is an individual unit,
-            # we need to determine if the current state and it
-            # have the same parent or not.
-            if work_parent == previous_parent:
-                # They have the same parent, so their edges are
-                # directly between one another
-                previous_ids.append(_friendly_name(previous_work))
-            else:
-                # The current and previous state do not have the same parent.
-                # so their edges are different. it is between the previous template
-                # and the current state.
-                current_ids = _dot_template_edge(template_id, current_ids,
-                                                 edge_attrs, previous_ids,
-                                                 previous_work)
-
-        elif isinstance(previous_work, WorkSequence):
-            # The previous state is a sequence so we need to grab the last state item finished
-            pwork = previous_work[CURRENT_INDEX]
-            if pwork.parent != work.parent:
-                current_ids = _dot_template_edge(template_id, current_ids,
-                                                 edge_attrs, previous_ids,
-                                                 pwork)
-
-        # OK now we create the edges from the previous and current ids
-        for p in previous_ids:
-            for c in current_ids:
-                edges += DotFormat.OUT_EDGE.format(id1=p, id2=c,
-                                                   attrs=_f_attrs(edge_attrs))
-
-    return edges
-
-
-def _dot_sequence(template_id, templates, edges, task_nodes, root_work):
+    if not previous_work:
+        # There is no previous state, so there are no incoming edges
+        return
+
+    # Only the template edge attributes are added here, the task edge
+    # attributes are formatted once in _TASK_EDGE_ATTRS
+    edge_attrs = {}
+    previous_ids = []
+    current_ids = []
+    friendly_name = _friendly_name
+    # The state classes are not subclassed, so the exact class is enough
+    work_type = type(work)
+    previous_type = type(previous_work)
+
+    # determine the current state ids (where the edges are going to)
+    if work_type is WorkParallel:
+        # The current state ids for the parallel is all the state in the list
+        current_ids = [friendly_name(workp) for workp in work]
+    elif work_type is WorkUnit:
+        # There is only one state id for an individual state unit
+        current_ids.append(friendly_name(work))
+    elif work_type is WorkSequence:
+        # The current state id for a sequences is the last item
+        current_ids.append(friendly_name(work[CURRENT_INDEX]))
+
+    # Now, we determine the previous state id (where the edges are coming from)
+    if previous_type is WorkParallel:
+        # We need to determine if the edge is between
+        # a WorkUnit or another template.
+        if work_type is WorkUnit:
+            #If the previous work is a work unit then we want
+            # the edges from each task to point to the WorkUnit
+            previous_ids = [friendly_name(workp) for workp in
+                            previous_work]
+        else:
+            # The current and previous work are both templates.
+            # so their edges are  between the previous template
+            # and the current template.
+            current_ids = _dot_template_edge(template_id, current_ids,
+                                             edge_attrs, previous_ids,
+                                             previous_work)
+    elif previous_type is WorkUnit:
+        # If the previous state is an individual unit,
+        # we need to determine if the current state and it
+        # have the same parent or not.
+        if work.parent is previous_work.parent:
+            # They have the same parent, so their edges are
+            # directly between one another
+            previous_ids.append(friendly_name(previous_work))
+        else:
+            # The current and previous state do not have the same parent.
+            # so their edges are different. it is between the previous template
+            # and the current state.
+            current_ids = _dot_template_edge(template_id, current_ids,
+                                             edge_attrs, previous_ids,
+                                             previous_work)
+
+    elif previous_type is WorkSequence:
+        # The previous state is a sequence so we need to grab the last state item finished
+        pwork = previous_work[CURRENT_INDEX]
+        if pwork.parent is not work.parent:
+            current_ids = _dot_template_edge(template_id, current_ids,
+                                             edge_attrs, previous_ids,
+                                             pwork)
+
+    # OK now we record the edges from the previous and current ids. They
+    # are formatted when they are written, after all the templates.
+    if not previous_ids or not current_ids:
+        return
+    if edge_attrs:
+        attrs = _TASK_EDGE_ATTRS + ' ' + _f_attrs(edge_attrs)
+    else:
+        attrs = _TASK_EDGE_ATTRS
+    edges.append((previous_ids, current_ids, attrs))
+
+
+def _dot_sequence(template_id, write_template, edges, task_nodes, root_work):
     """
     Generate the DOT string for a WorkSequence
 
-    :param edges: string representing DOT edges
-    :param task_nodes: string of nodes for writing to the DOT file
+    :param write_template: function that writes each DOT subgraph
+    :param edges: list of `(previous ids, current ids, attributes)` for the
+        DOT edges, see :func:`_dot_edges`
+    :param task_nodes: list of nodes for the current template, emptied when
+        the template is written
     :param state: the state node write a DOT file for
     :type: WorkBase
-    :return: tuple of edges and nodes
+    :return: None
     """
 
-    for work in root_work:
-        if isinstance(work, WorkUnit):
-            task_nodes = _dot_work(work, task_nodes)
-            edges = _dot_edges(edges, work, template_id)
-        elif isinstance(work, WorkParallel):
-            task_nodes = _dot_parallel(work, task_nodes)
-            edges = _dot_edges(edges, work, template_id)
-        elif isinstance(work, WorkSequence):
-            templates, edges, task_nodes = _dot_sequence(template_id, templates,
-                                                         edges, task_nodes,
-                                                         work)
-
-        # If the parent of the current state does not have a parent we are at a template level
-        if not work.parent.parent:
-            templates += DotFormat.OUT_SUBGRAPH.format(
-                id="cluster_{}".format(template_id), rank='', nodes=task_nodes,
-                label='label=' + '"' + work.name + '"',
-                fontColor="fontcolor=black;", color="color=black;")
-            template_id += 1
-            task_nodes = ''
-
-    return templates, edges, task_nodes
+    # Nested sequences are walked with an explicit stack instead of
+    # recursion. Each entry is a sequence being walked: the iterator over
+    # its items, its template id, the previous state and the item to finish
+    # when the walk resumes (a nested sequence that has just been walked).
+    # The sequence is walked in order, so the previous state of each item is
+    # the item before it. Only the first item needs a lookup, which avoids
+    # searching the parent for every item.
+    stack = [(iter(root_work), template_id, root_work.previous, None)]
+    while stack:
+        items, template_id, previous_work, work = stack.pop()
+        while True:
+            if work is not None:
+                # If the parent of the current state does not have a parent we are at a template level
+                if not work.parent.parent:
+                    write_template(DotFormat.OUT_SUBGRAPH.format(
+                        id="cluster_{}".format(template_id), rank='',
+                        nodes=''.join(task_nodes),
+                        label='label=' + '"' + work.name + '"',
+                        fontColor="fontcolor=black;", color="color=black;"))
+                    template_id += 1
+                    del task_nodes[:]
+                previous_work = work
+
+            work = next(items, None)
+            if work is None:
+                break
+            if type(work) is WorkSequence:
+                # Walk the nested sequence, then finish it and carry on
+                # with the rest of this one
+                stack.append((items, template_id, previous_work, work))
+                stack.append((iter(work), template_id, work.previous, None))
+                break
+            dot_fn = _DOT_SEQUENCE_ITEM.get(type(work))
+            if dot_fn is not None:
+                dot_fn(template_id, edges, task_nodes, work, previous_work)
+
+
+def _dot_sequence_unit(template_id, edges, task_nodes, work, previous_work):
+    _dot_work(work, task_nodes)
+    _dot_edges(edges, work, template_id, previous_work)
+
+
+def _dot_sequence_parallel(template_id, edges, task_nodes, work,
+                           previous_work):
+    _dot_parallel(work, task_nodes)
+    _dot_edges(edges, work, template_id, previous_work)
+
+
+# DOT generation for the items of a sequence, by state class. Nested
+# sequences are walked by _dot_sequence itself.
+_DOT_SEQUENCE_ITEM = {WorkUnit: _dot_sequence_unit,
+                      WorkParallel: _dot_sequence_parallel}
+
+
+# Friendly names by name, the same state is named by several nodes and edges
+_friendly_names = {}
+
+# Characters removed from friendly names, anything that is not alphanumeric
+# or an underscore
+_NOT_FRIENDLY = re.compile(r'\W', re.UNICODE)
 
 
 def _friendly_name(work):
@@ -421,7 +537,12 @@ def _friendly_name(work):
     :return:
     """
     if work and hasattr(work, "name"):
-        return "".join(x for x in work.name if x.isalnum() or x in '_')
+        name = work.name
+        friendly_name = _friendly_names.get(name)
+        if friendly_name is None:
+            friendly_name = _NOT_FRIENDLY.sub('', name)
+            _friendly_names[name] = friendly_name
+        return friendly_name
     else:
         return None
 
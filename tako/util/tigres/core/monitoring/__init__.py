@@ -38,7 +38,7 @@ def start(name=None, log_dest=None, execution=Execution.LOCAL_THREAD, **kwargs):
     :raises: TigresException
     """
     Program.clear()
-    Program(name, log_dest=log_dest, execution=execution, **kwargs)
+    Program(name, log_dest=log_dest, execution=execution, **kwargs).bootstrap()
 
 
 def end():
@@ -49,53 +49,31 @@ def end():
     Program().clear()
 
 
-def log_error(*args, **kwargs):
-    """Write a user log entry at level ERROR.
+def _make_logger(name, level):
+    """Create a user log function that calls `write()` at the given level.
 
-    This simply calls `write()` with the `level` argument
-    set to ERROR. See documentation of `write()` for details.
+    The level and the `write()` function are bound in the closure, so a call
+    does not look them up as globals. The program identifier is still read
+    per call because a program may be restarted after the function has been
+    imported.
     """
-    kwargs[Keyword.PROGRAM_UID] = Program().identifier
-    return write(Level.ERROR, *args, **kwargs)
+    program_uid = Keyword.PROGRAM_UID
 
+    def logger(*args, **kwargs):
+        kwargs[program_uid] = Program().identifier
+        return write(level, *args, **kwargs)
 
-def log_warn(*args, **kwargs):
-    """Write a user log entry at level ERROR.
+    logger.__name__ = name
+    logger.__doc__ = """Write a user log entry at level {0}.
 
     This simply calls `write()` with the `level` argument
-    set to ERROR. See documentation of `write()` for details.
-    """
-    kwargs[Keyword.PROGRAM_UID] = Program().identifier
-    return write(Level.WARN, *args, **kwargs)
-
-
-def log_info(*args, **kwargs):
-    """Write a user log entry at level INFO.
-
-    This simply calls `write()` with the `level` argument
-    set to INFO. See documentation of `write()` for details.
-    """
-    kwargs[Keyword.PROGRAM_UID] = Program().identifier
-    return write(Level.INFO, *args, **kwargs)
-
-
-def log_debug(*args, **kwargs):
-    """Write a user log entry at level DEBUG.
-
-    This simply calls `write()` with the `level` argument
-    set to DEBUG. See documentation of `write()` for details.
-    """
-    kwargs[Keyword.PROGRAM_UID] = Program().identifier
-    return write(Level.DEBUG, *args, **kwargs)
-
-
-def log_trace(*args, **kwargs):
-    """Write a user log entry at level TRACE.
-
-    This simply calls `write()` with the `level` argument
-    set to TRACE. See documentation of `write()` for details.
-    """
-    kwargs[Keyword.PROGRAM_UID] = Program().identifier
-    return write(Level.TRACE, *args, **kwargs)
+    set to {0}. See documentation of `write()` for details.
+    """.format(Level.to_name(level))
+    return logger
 
 
+log_error = _make_logger('log_error', Level.ERROR)
+log_warn = _make_logger('log_warn', Level.WARN)
+log_info = _make_logger('log_info', Level.INFO)
+log_debug = _make_logger('log_debug', Level.DEBUG)
+log_trace = _make_logger('log_trace', Level.TRACE)
@@ -28,6 +28,9 @@ ENV_LOG_LEVEL = 'TIGRES_LOG_LEVEL'
 
 LOG_FORMAT_JSON, LOG_FORMAT_NL = 'json', 'nl'
 
+#: Length prefixed MessagePack records, needs the optional msgspec package
+LOG_FORMAT_MSGPACK = 'msgpack'
+
 
 class NotInitializedError(Exception):
     """Raised when attempt to use API methods like query()
@@ -211,11 +214,13 @@ class NodeType(object):
         return cls._all
 
 
-class ThreadVar:
+class ThreadVar(object):
     """
     Thread-safe/local access to a single variable value.
     """
 
+    __slots__ = ('_lock', '_values', '_value', '_local')
+
     def __init__(self, local=True):
         self._lock = threading.Lock()
         if local:
@@ -40,12 +40,41 @@ import calendar
 import codecs
 from collections import OrderedDict
 import json
+from json.encoder import encode_basestring_ascii
 import re
+import struct
+from sys import float_info
 import time
 from warnings import warn
+
+try:
+    from msgspec import msgpack
+except ImportError:
+    # The MessagePack log format is not available
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    # JSON records are parsed with the standard library
+    orjson = None
+
 # Package imports
 from tigres.core.monitoring.common import Level, Keyword, MetaKeyword, \
-    DEFAULT_ENCODING, META_LINE_MARKER, LOG_FORMAT_JSON, LOG_FORMAT_NL
+    DEFAULT_ENCODING, META_LINE_MARKER, LOG_FORMAT_JSON, LOG_FORMAT_NL, \
+    LOG_FORMAT_MSGPACK
+
+# Length prefix of each record in a MessagePack log, big-endian unsigned
+MSGPACK_LENGTH = struct.Struct('>I')
+
+META_LINE_MARKER_BYTES = META_LINE_MARKER.encode('ascii')
+
+# Read buffer for log files, records are streamed from it one at a time
+READ_BUFFER_SIZE = 1 << 20
+
+# Range of the floats that JSON encodes as numbers, NaN and the
+# infinities are outside it
+_FINITE_MIN, _FINITE_MAX = -float_info.max, float_info.max
 
 # Regular expression to parse a text log record.
 # Parameters are enclosed in {braces}, they will
@@ -62,6 +91,50 @@ KVP_EXPR = r"""(?:
 )"""
 
 
+def json_loads(text):
+    """Parse a JSON record, with orjson when it is installed.
+
+    Records that orjson rejects, such as ones holding NaN, are parsed
+    by the standard library.
+
+    :param text: JSON text
+    :type text: str or bytes
+    :return: Parsed object
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except ValueError:
+            pass
+    return json.loads(text)
+
+
+def msgpack_encoder():
+    """Create an encoder for MessagePack log records.
+
+    Values that MessagePack cannot encode are written as strings.
+
+    :return: Encoder
+    :raise: ValueError if the msgspec package is not installed
+    """
+    if msgpack is None:
+        raise ValueError(
+            "Log format {} requires the msgspec package".format(
+                LOG_FORMAT_MSGPACK))
+    return msgpack.Encoder(enc_hook=str)
+
+
+def msgpack_frame(encoded):
+    """Frame an encoded MessagePack record with its length.
+
+    :param encoded: Encoded record
+    :type encoded: bytes
+    :return: Length prefix and record
+    :rtype: bytes
+    """
+    return MSGPACK_LENGTH.pack(len(encoded)) + encoded
+
+
 def parse_timestamp(ts):
     """Parse a timestamp
 
@@ -245,20 +318,45 @@ class Record(object):
 class Reader:
     ignore_bad = False
 
-    def __init__(self, path_or_file, kv_sep='=', encoding=DEFAULT_ENCODING):
+    def __init__(self, path_or_file, kv_sep='=', encoding=DEFAULT_ENCODING,
+                 required=None, required_any=None):
         """Create new reader with input object.
 
         :param path_or_file: Input
         :type path_or_file: str or iterable (ie has `next()`)
         :param kv_sep: Key/value separator char
         :type kv_sep: str
+        :param required: ASCII strings that every wanted record contains, such as
+                         key names. Text records without one of them are skipped
+                         before they are decoded and parsed.
+        :type required: list of str or None
+        :param required_any: Groups of ASCII strings, every wanted record
+                             contains at least one string of each group.
+                             Text records that do not are skipped like
+                             those without a `required` string.
+        :type required_any: list of (list of str) or None
         :raises: ValueError if input is not a path, or not iterable
         """
+        self._required = tuple(required) if required else ()
+        self._required_bytes = tuple(r.encode('ascii') for r in self._required)
+        # Each group is searched for with one pattern, for text and bytes
+        self._required_any = tuple(
+            re.compile('|'.join(re.escape(r) for r in group))
+            for group in (required_any or ()))
+        self._required_any_bytes = tuple(
+            re.compile(b'|'.join(re.escape(r.encode('ascii')) for r in group))
+            for group in (required_any or ()))
+        self._screen = bool(self._required or self._required_any)
+        self._decoder = None
         if isinstance(path_or_file, str):
             try:
                 self._encoding = encoding.lower()
-                self._in = codecs.open(path_or_file, mode='rb',
-                                       encoding=self._encoding)
+                codecs.lookup(self._encoding)
+                # Text records are read as bytes lines, so the ones to
+                # skip are never decoded
+                self._in = open(path_or_file, 'rb',
+                                buffering=READ_BUFFER_SIZE)
+                is_msgpack = self._is_msgpack(self._in)
             except Exception as err:
                 raise ValueError(
                     'Cannot open input file "{}": {}'.format(path_or_file, err))
@@ -269,9 +367,29 @@ class Reader:
                         type(path_or_file)))
             self._in = path_or_file
             self._encoding = None
+            is_msgpack = self._is_msgpack(path_or_file)
+        if is_msgpack:
+            if msgpack is None:
+                raise ValueError(
+                    "Reading a {} log requires the msgspec package".format(
+                        LOG_FORMAT_MSGPACK))
+            self._decoder = msgpack.Decoder()
         self._expr = re.compile(KVP_EXPR.format(sep=kv_sep), flags=re.X)
         self._is_json = True
 
+    @staticmethod
+    def _is_msgpack(f):
+        """Whether a binary input holds MessagePack records.
+
+        The records start with their length, and the first byte of the
+        length is zero for any record under 16MB. Text logs never start
+        with a zero byte.
+        """
+        peek = getattr(f, 'peek', None)
+        if peek is None:
+            return False
+        return peek(1)[:1] == b'\0'
+
     def __iter__(self):
         return self
 
@@ -286,6 +404,8 @@ class Reader:
         :raises: ValueError on bad record, unless the class attribute `ignore_bad` is True.
                  StopIteration at end of data
         """
+        if self._decoder is not None:
+            return self._next_msgpack()
         # process initial metadata
         text = None
         while 1:
@@ -293,13 +413,18 @@ class Reader:
                 text = next(self._in)
             except TypeError:
                 text = self._in.next()
+            if self._screen and self._skip(text):
+                continue
             if not isinstance(text, str):
-                text = get_str(text)
+                if self._encoding is None:
+                    text = get_str(text)
+                else:
+                    text = text.decode(self._encoding)
             if not text.startswith(META_LINE_MARKER):
                 break
             self._process_meta(text[len(META_LINE_MARKER):])
         if self._is_json:
-            result = json.loads(text)
+            result = json_loads(text)
         else:
             result = self._parse_kvp(text)
         if not result and not self.ignore_bad:
@@ -307,6 +432,51 @@ class Reader:
                 "No key/value pairs in record: '{}'".format(text.strip()))
         return Record(result)
 
+    def _skip(self, text):
+        """Whether a text record lacks one of the required strings, or
+        all the strings of a group. Metadata lines are never skipped.
+        """
+        if isinstance(text, bytes):
+            required, marker = self._required_bytes, META_LINE_MARKER_BYTES
+            required_any = self._required_any_bytes
+        else:
+            required, marker = self._required, META_LINE_MARKER
+            required_any = self._required_any
+        if text.startswith(marker):
+            return False
+        for r in required:
+            if r not in text:
+                return True
+        for group in required_any:
+            if group.search(text) is None:
+                return True
+        return False
+
+    def _next_msgpack(self):
+        """Decode the next MessagePack record, processing any metadata
+        records before it. A truncated record at the end of the input, from
+        a write in progress, ends the data.
+        """
+        read = self._in.read
+        while 1:
+            prefix = read(MSGPACK_LENGTH.size)
+            if len(prefix) < MSGPACK_LENGTH.size:
+                raise StopIteration
+            size, = MSGPACK_LENGTH.unpack(prefix)
+            encoded = read(size)
+            if len(encoded) < size:
+                raise StopIteration
+            try:
+                result = self._decoder.decode(encoded)
+            except Exception as err:
+                if self.ignore_bad:
+                    return Record()
+                raise ValueError("Bad MessagePack record: {}".format(err))
+            meta = result.get(META_LINE_MARKER)
+            if meta is None:
+                return Record(result)
+            self._process_meta_kvp(meta)
+
     def _parse_kvp(self, text):
         result = {}
         for n, v, vq in self._expr.findall(text):
@@ -322,7 +492,9 @@ class Reader:
         return result
 
     def _process_meta(self, text):
-        kvp = json.loads(text)
+        self._process_meta_kvp(json_loads(text))
+
+    def _process_meta_kvp(self, kvp):
         for name, value in kvp.items():
             value = value.lower()
             if name == MetaKeyword.ENCODING:
@@ -337,6 +509,8 @@ class Reader:
                     self._is_json = False
                 elif value == LOG_FORMAT_JSON:
                     self._is_json = True
+                elif value == LOG_FORMAT_MSGPACK and self._decoder is not None:
+                    pass
                 else:
                     raise ValueError(
                         "Invalid log format ({}) in metadata: {}".format(value,
@@ -382,15 +556,50 @@ class Writer(object):
 
 
 class KvpFormatter(object):
+    # JSON encoded keys, with the key/value separator, shared by all formatters
+    _json_keys = {}
+
     def __init__(self, log_format):
         self._is_json = log_format == LOG_FORMAT_JSON
 
+    def _json_kvp_str(self, kvp):
+        """Encode the key/value pairs as the body of a JSON object.
+
+        The output is the same as `json.dumps(kvp)[1:-1]`. Keys are encoded once
+        and cached, and string, number, boolean and null values are encoded
+        directly instead of going through the full JSON encoder.
+        """
+        keys = self._json_keys
+        fields = []
+        for k, v in kvp.items():
+            ek = keys.get(k)
+            if ek is None:
+                if not isinstance(k, str):
+                    # let the JSON encoder coerce non-string keys
+                    return json.dumps(kvp)[1:-1]
+                ek = keys[k] = encode_basestring_ascii(k) + ': '
+            if v.__class__ is str:
+                fields.append(ek + encode_basestring_ascii(v))
+            elif v.__class__ is int:
+                fields.append(ek + int.__repr__(v))
+            elif v is None:
+                fields.append(ek + 'null')
+            elif v is True:
+                fields.append(ek + 'true')
+            elif v is False:
+                fields.append(ek + 'false')
+            elif v.__class__ is float and _FINITE_MIN <= v <= _FINITE_MAX:
+                fields.append(ek + float.__repr__(v))
+            else:
+                fields.append(ek + json.dumps(v))
+        return ', '.join(fields)
+
     def _kvp_str(self, kvp, strip=True):
         if self._is_json:
             if strip:
-                s = json.dumps(kvp)[1:-1]
+                s = self._json_kvp_str(kvp)
             else:
-                s = json.dumps(kvp)
+                s = '{' + self._json_kvp_str(kvp) + '}'
         else:
             fields = []
             for k, v in kvp.items():
@@ -23,7 +23,8 @@ except NameError:
     pass
 
 # Standard imports
-from datetime import datetime
+import atexit
+import io
 import itertools
 import json
 import logging
@@ -37,10 +38,15 @@ except ImportError:
     import Queue
 
     queue = Queue
+try:
+    SimpleQueue = queue.SimpleQueue
+except AttributeError:
+    # Python < 3.7
+    SimpleQueue = queue.Queue
 import re
-import signal
 import socket
 import sqlite3
+import sys
 
 try:
     from  urllib import parse
@@ -50,16 +56,20 @@ except ImportError:
     parse = urlparse
 import threading
 import time
+import traceback
 from uuid import uuid4
+import weakref
 
 # Package imports
 from tigres.utils import State
-from tigres.core.monitoring.kvp import Reader, Record, LogWriter, KvpFormatter
+from tigres.core.monitoring.kvp import Reader, Record, LogWriter, KvpFormatter, \
+    msgpack_encoder, msgpack_frame, META_LINE_MARKER_BYTES, READ_BUFFER_SIZE
 from tigres.core.monitoring.receive import TCPClient
 from tigres.core.monitoring.common import NotInitializedError
 from tigres.core.monitoring.common import Level, Keyword, MetaKeyword, NodeType
 from tigres.core.monitoring.common import DEFAULT_ENCODING, META_LINE_MARKER
-from tigres.core.monitoring.common import LOG_FORMAT_JSON, LOG_FORMAT_NL
+from tigres.core.monitoring.common import LOG_FORMAT_JSON, LOG_FORMAT_NL, \
+    LOG_FORMAT_MSGPACK
 from tigres.core.monitoring import search
 
 # Global internal log objs
@@ -70,12 +80,25 @@ STOP_TIMEOUT = 2  # seconds
 
 _log_readonly = False
 
+# Node records of the log read so far by check()
+_node_index = None
+
 # Default level
 _tigres_level = Level.INFO
 
 # Log format
 _tigres_log_format = LOG_FORMAT_JSON
 
+# Keywords and levels used for every record, looked up once
+_KW_NAME = Keyword.NAME
+_KW_NODETYPE = Keyword.NODETYPE
+_KW_STATE = Keyword.STATE
+_KW_PROGRAM_UID = Keyword.PROGRAM_UID
+_KW_PROGRAM_NAME = Keyword.PROGRAM_NAME
+# Python logging level of each Tigres level, as given by Level.to_logging()
+_LOGGING_LEVELS = dict((level, Level.to_logging(level))
+                       for level in range(Level.NONE, Level.MAX + 1))
+
 # Tigre Program Variables
 _program_name = None
 _program_uuid = None
@@ -91,9 +114,12 @@ def set_log_format(s):
         s = s.lower()
     except AttributeError:
         raise ValueError("Log format must be a string")
-    formats = (LOG_FORMAT_JSON, LOG_FORMAT_NL)
+    formats = (LOG_FORMAT_JSON, LOG_FORMAT_NL, LOG_FORMAT_MSGPACK)
     if s not in formats:
         raise ValueError("Log format must be {}".format(' or '.join(formats)))
+    if s == LOG_FORMAT_MSGPACK:
+        # Raises ValueError if msgspec is missing
+        msgpack_encoder()
     _tigres_log_format = s
 
 
@@ -105,38 +131,32 @@ def _safe_del(d, keys):
 
 # Some helper code to get host address
 
-_host_address_cached = None
-
+# Seconds that get_host_address() waits for the host lookup
+HOST_ADDRESS_TIMEOUT = 2
 
-def _get_host_address_timeout(signo, frame):
-    raise Exception("Hostname timeout")
+_host_address_cached = None
+# Thread looking up the host address, and the process it runs in
+_host_address_lookup = None
+_host_address_pid = None
+_host_address_lock = threading.Lock()
 
 
-def get_host_address():
-    """Find IP address for this host.
-
-    This uses signals to do a quicker timeout. Please don't try
-    to call this in a multi-threaded context.
+def _lookup_host_address():
+    """Look up the IP address for this host. This may block on DNS.
 
     :return: IP address
     :rtype: str
     """
-    global _host_address_cached
-    if _host_address_cached is not None:
-        return _host_address_cached
     if os.getenv("PBS_ENVIRONMENT") is not None:
         # get it from PBS
         pass  # .. TODO:: get from PBS env vars
         # otherwise, get IP addr
-    signal.signal(signal.SIGALRM, _get_host_address_timeout)
     # . start with hostname from fqdn()
-    signal.alarm(2)
     # noinspection PyBroadException
     try:
         hostname = socket.getfqdn()
     except:
         hostname = '*'
-    signal.alarm(0)
     # . get IP from host name
     ip = hostname
     try:
@@ -152,10 +172,65 @@ def get_host_address():
             # give up, will just use hostname
             if ip == '*':
                 ip = '0.0.0.0'
-    _host_address_cached = ip
+        finally:
+            s.close()
     return ip
 
 
+def _resolve_host_address():
+    global _host_address_cached
+    # noinspection PyBroadException
+    try:
+        ip = _lookup_host_address()
+    except:
+        ip = '0.0.0.0'
+    # An address set with set_host_address() is kept
+    if _host_address_cached is None:
+        _host_address_cached = ip
+
+
+def _start_host_address_lookup():
+    """Start looking up the host address in a background thread, once per
+    process, unless it is already known.
+
+    :return: The lookup thread, or None if the address is known
+    :rtype: threading.Thread or None
+    """
+    global _host_address_lookup, _host_address_pid
+    if _host_address_cached is not None:
+        return None
+    with _host_address_lock:
+        pid = os.getpid()
+        if _host_address_lookup is None or _host_address_pid != pid:
+            lookup = threading.Thread(target=_resolve_host_address,
+                                      name="TigresHostAddress")
+            lookup.daemon = True
+            lookup.start()
+            _host_address_lookup, _host_address_pid = lookup, pid
+        return _host_address_lookup
+
+
+def get_host_address():
+    """Find IP address for this host.
+
+    The address is looked up once, in a background thread started by
+    :func:`init` or by the first call. This waits up to
+    `HOST_ADDRESS_TIMEOUT` seconds for the lookup, and can be called
+    from any thread.
+
+    :return: IP address, '0.0.0.0' if the lookup has not finished in time
+    :rtype: str
+    """
+    if _host_address_cached is not None:
+        return _host_address_cached
+    lookup = _start_host_address_lookup()
+    if lookup is not None:
+        lookup.join(HOST_ADDRESS_TIMEOUT)
+    if _host_address_cached is not None:
+        return _host_address_cached
+    return '0.0.0.0'
+
+
 def set_host_address(addr):
     """Put fixed value into host address.
     """
@@ -163,6 +238,37 @@ def set_host_address(addr):
     _host_address_cached = addr
 
 
+# Local time of the last second formatted by _isoformat(), and its text
+_iso_second = (None, '')
+
+
+def _isoformat(timestamp):
+    """Format a time as `datetime.fromtimestamp(timestamp).isoformat()`
+    does, in local time with microseconds when they are not zero.
+
+    The text of the whole seconds only changes once a second, so it is
+    kept for the following calls.
+
+    :param timestamp: Seconds since the epoch, from `time.time()`
+    :type timestamp: float
+    :rtype: str
+    """
+    global _iso_second
+    second = int(timestamp)
+    # Rounded the way datetime rounds the fraction
+    microsecond = int(round((timestamp - second) * 1000000))
+    if microsecond >= 1000000:
+        second += 1
+        microsecond -= 1000000
+    cached_second, text = _iso_second
+    if second != cached_second:
+        text = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second))
+        _iso_second = (second, text)
+    if microsecond:
+        return '%s.%06d' % (text, microsecond)
+    return text
+
+
 # end of helper code
 
 
@@ -174,40 +280,102 @@ class BaseLogger(object):
     def set_level(self, level):
         pass
 
+    def is_enabled(self, level):
+        """Whether a message at `level` would be logged.
+        """
+        return True
+
     def log(self, level, name, kvp):
         pass
 
+    def flush(self):
+        """Wait until everything logged so far is in the destination.
+        """
+        pass
+
     def close(self):
         pass
 
 
+# File loggers that are not closed yet, closed when the program exits
+_open_file_loggers = weakref.WeakSet()
+
+
+def _close_at_exit():
+    for logger in list(_open_file_loggers):
+        logger.close()
+
+
+atexit.register(_close_at_exit)
+
+
 class FileLogger(BaseLogger, KvpFormatter):
-    """Send logs to a file (using Python logging).
+    """Send logs to a file.
+
+    A writer thread formats the queued records and appends them to the
+    file, several at a time with a single unbuffered write. The thread
+    that logs only queues the time, level and a copy of the key/value
+    pairs; records with values other than strings, numbers and None are
+    formatted when they are logged, so that encoding errors reach the
+    caller and later changes to the values are not logged. Call
+    :meth:`flush` before reading the file. The Python logger is only used
+    for its level.
     """
-
-    def __init__(self, path, logger_name, mode='a'):
-        """Initialize Python Logger output for monitoring data.
+    # Maximum number of queued records in one write
+    WRITE_BATCH_SIZE = 1000
+    # Seconds between checks that the writer thread is still running,
+    # while waiting for it to write
+    FLUSH_CHECK_INTERVAL = 1.0
+    # Record lines, with the time, level and formatted key/value pairs
+    _JSON_LINE = '{{"{}": "%s", "level": "%s", %s}}\n'.format(Keyword.TIME)
+    _NL_LINE = '{}=%s level=%s %s\n'.format(Keyword.TIME)
+    # Metadata line, with the time, level and metadata
+    _META_LINE = META_LINE_MARKER + ' ' + _JSON_LINE
+    # Values that are formatted by the writer thread. Python 2 byte
+    # strings may not decode, they are formatted by the caller.
+    _PLAIN_TYPES = frozenset((type(u''), int, float, bool, type(None)))
+
+    def __init__(self, path, logger_name, mode='a', parent=None):
+        """Initialize file output for monitoring data.
+
+        :param parent: Logger that also gets every record, as the parent
+            logger in the Python logging hierarchy did (Default: None)
+        :type parent: FileLogger or None
         """
         KvpFormatter.__init__(self, get_log_format())
         self.path = path
         self.is_file = True
 
         self._log = logging.getLogger(logger_name)
-        self._handler = logging.FileHandler(path, encoding=DEFAULT_ENCODING,
-                                            mode=mode)
-        self._meta_formatter = JsonFormatter(meta=True)
-        if self._is_json:
-            self._main_formatter = JsonFormatter()
+        self._parent = parent
+        self._is_msgpack = get_log_format() == LOG_FORMAT_MSGPACK
+        if self._is_msgpack:
+            self._encoder = msgpack_encoder()
+        elif self._is_json:
+            self._line = self._JSON_LINE
         else:
-            self._main_formatter = LogFormatter()
-            # self._meta_formatter = logging.Formatter("{} %(msg)s".format(META_LINE_MARKER))
-        self._handler.setFormatter(self._main_formatter)
-        if not self._log.handlers:
-            self._log.addHandler(self._handler)
+            self._line = self._NL_LINE
+
+        readonly = mode == 'r'
+        self._writer = None
+        if readonly:
+            self._fh = None
+        else:
+            # Unbuffered, so each batch of records is appended with one write
+            self._fh = io.open(path, mode + 'b', buffering=0)
+            self._queue = SimpleQueue()
+            # Forked processes write directly, the writer thread only
+            # runs in this process
+            self._pid = os.getpid()
+            self._writer = threading.Thread(target=self._drain,
+                                            name="TigresFileLogger")
+            self._writer.daemon = True
+            self._writer.start()
+            # Write what is queued if the program exits without closing
+            _open_file_loggers.add(self)
 
         self.set_level(Level.INFO)
 
-        readonly = mode == 'r'
         if not readonly:
             self.add_metadata({MetaKeyword.ENCODING: DEFAULT_ENCODING,
                                MetaKeyword.FORMAT: get_log_format()})
@@ -215,14 +383,23 @@ class FileLogger(BaseLogger, KvpFormatter):
     def add_metadata(self, kvp):
         """Write some metadata into the log.
         """
-        self._handler.setFormatter(self._meta_formatter)
-        self._log.log(self._loglevel, json.dumps(kvp)[1:-1])
-        self._handler.setFormatter(self._main_formatter)
+        if self._is_msgpack:
+            # Metadata records hold the metadata under the line marker
+            self._write(self._msgpack_record(time.time(), self._loglevel,
+                                             {META_LINE_MARKER: kvp}))
+        else:
+            self._write(self._format_line(self._META_LINE, time.time(),
+                                          self._loglevel,
+                                          json.dumps(kvp)[1:-1]))
 
     def set_level(self, level):
         self._loglevel = Level.to_logging(level)
         self._log.setLevel(self._loglevel)
 
+    def is_enabled(self, level):
+        return self._log.isEnabledFor(
+            _LOGGING_LEVELS.get(level, logging.NOTSET))
+
     def log(self, level, name, kvp):
         """Log the information
 
@@ -230,23 +407,161 @@ class FileLogger(BaseLogger, KvpFormatter):
         :rtype: bool
         """
         did_log = False
-        kvp[Keyword.NAME] = name
-        logging_level = Level.to_logging(level)
+        kvp[_KW_NAME] = name
+        logging_level = _LOGGING_LEVELS.get(level, logging.NOTSET)
         if self._log.isEnabledFor(logging_level):
-            self._log.log(logging_level, self._kvp_str(kvp))
+            plain_types = self._PLAIN_TYPES
+            record = (time.time(), logging_level, kvp)
+            for v in kvp.values():
+                if v.__class__ not in plain_types:
+                    record = self._format_record(*record)
+                    break
+            else:
+                record = (record[0], logging_level, dict(kvp))
+            self._write(record)
+            if self._parent is not None:
+                self._parent._write(record)
             did_log = True
         return did_log
 
-    def close(self):
-        """Close the logger.
+    def _format_record(self, timestamp, logging_level, kvp):
+        """Format a record for the file.
+
+        :return: Encoded record
+        :rtype: bytes
         """
-        if self._log is not None:
-            for hndlr in self._log.handlers:
-                self._log.removeHandler(hndlr)
-                hndlr.close()
+        if self._is_msgpack:
+            return self._msgpack_record(timestamp, logging_level, kvp)
+        return self._format_line(self._line, timestamp, logging_level,
+                                 self._kvp_str(kvp))
+
+    @staticmethod
+    def _format_line(line, timestamp, logging_level, body):
+        """Format a text line, with the same time and level fields as the
+        Python logging formatters wrote.
+        """
+        return (line % (_isoformat(timestamp),
+                        logging.getLevelName(logging_level),
+                        body)).encode(DEFAULT_ENCODING)
 
-            del self._log
-            self._log = None
+    def _msgpack_record(self, timestamp, logging_level, kvp):
+        """Encode a MessagePack record, with the same time and level fields
+        as the JSON records.
+        """
+        rec = {Keyword.TIME: _isoformat(timestamp),
+               Keyword.LEVEL: logging.getLevelName(logging_level)}
+        rec.update(kvp)
+        return msgpack_frame(self._encoder.encode(rec))
+
+    def _write(self, record):
+        """Queue a record for the writer thread, or write it directly.
+
+        :param record: Encoded record, or the time, level and key/value
+            pairs of a record to format
+        :type record: bytes or tuple
+        """
+        if self._writer is not None and os.getpid() == self._pid:
+            self._queue.put(record)
+        elif self._fh is not None:
+            if record.__class__ is tuple:
+                record = self._format_record(*record)
+            self._fh.write(record)
+
+    def _drain(self):
+        """Write the queued records until the stop sentinel is queued.
+        Events queued by :meth:`flush` are set once the records queued
+        before them are written.
+        """
+        get = self._queue.get
+        write = self._fh.write
+        format_record = self._format_record
+        while True:
+            items = [get()]
+            while len(items) < self.WRITE_BATCH_SIZE:
+                try:
+                    items.append(get(block=False))
+                except queue.Empty:
+                    break
+            data = []
+            for item in items:
+                if item.__class__ is tuple:
+                    try:
+                        data.append(format_record(*item))
+                    except Exception:
+                        self._handle_error()
+                elif isinstance(item, bytes):
+                    data.append(item)
+            if data:
+                try:
+                    write(b''.join(data))
+                except Exception:
+                    self._handle_error()
+            # Set even if the records could not be written
+            for item in items:
+                if item is None:
+                    return
+                if not isinstance(item, (bytes, tuple)):
+                    item.set()
+
+    def _handle_error(self):
+        """Report an error formatting or writing records, as
+        :meth:`logging.Handler.handleError` does, and carry on.
+        """
+        if logging.raiseExceptions and sys.stderr:
+            try:
+                sys.stderr.write('--- Logging error ---\n')
+                traceback.print_exc(file=sys.stderr)
+                sys.stderr.write('Writing to log file {}\n'.format(self.path))
+            except Exception:
+                pass
+
+    def flush(self):
+        writer = self._writer
+        if writer is None or os.getpid() != self._pid:
+            return
+        written = threading.Event()
+        self._queue.put(written)
+        # Waiting with a timeout also lets Python 2 be interrupted
+        while not written.wait(self.FLUSH_CHECK_INTERVAL):
+            if not writer.is_alive():
+                # Write what the thread left, and from now on write directly
+                self._writer = None
+                self._write_queued()
+                return
+
+    def _write_queued(self):
+        """Write the records left in the queue once the writer thread has
+        ended, and set the queued events.
+        """
+        while True:
+            try:
+                item = self._queue.get(block=False)
+            except queue.Empty:
+                return
+            if item is None:
+                continue
+            if isinstance(item, (bytes, tuple)):
+                try:
+                    self._write(item)
+                except Exception:
+                    self._handle_error()
+            else:
+                item.set()
+
+    def close(self):
+        """Close the logger, after writing the queued records.
+        """
+        _open_file_loggers.discard(self)
+        writer, self._writer = self._writer, None
+        if writer is not None and os.getpid() == self._pid:
+            self._queue.put(None)
+            writer.join()
+            # Left over if the thread ended early
+            self._write_queued()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self._parent = None
 
 
 class SqliteLogger(BaseLogger):
@@ -254,6 +569,13 @@ class SqliteLogger(BaseLogger):
     """
     TABLE = 'log'
     KEY_COL, VAL_COL, ID_COL = 'key', 'value', 'item'
+    # Maximum number of queued messages inserted in one transaction
+    BATCH_SIZE = 1000
+    # Each transaction is committed without waiting for the data to be
+    # synced to disk; the write-ahead log keeps the database consistent.
+    # The page cache is 64MB and up to 256MB of the file is memory mapped.
+    PRAGMAS = ('journal_mode=WAL', 'synchronous=NORMAL', 'temp_store=MEMORY',
+               'cache_size=-65536', 'mmap_size=268435456')
 
     def __init__(self, path):
         """Initialize SQLite3 output for monitoring data.
@@ -271,6 +593,9 @@ class SqliteLogger(BaseLogger):
     def set_level(self, level):
         self._level = level
 
+    def is_enabled(self, level):
+        return level <= self._level
+
     def log(self, level, name, kvp):
         if level > self._level:
             return
@@ -291,45 +616,58 @@ class SqliteLogger(BaseLogger):
         global g_stop_ack
         g_stop_ack = False
         self._db = sqlite3.connect(path)
+        for pragma in self.PRAGMAS:
+            self._db.execute('PRAGMA ' + pragma)
         self._db.execute('''CREATE TABLE IF NOT EXISTS {table}
                   (id INTEGER PRIMARY KEY autoincrement, {lid} INTEGER, {key} TEXT, {val} TEXT);
                   '''.format(table=self.TABLE, key=self.KEY_COL,
                              val=self.VAL_COL, lid=self.ID_COL))
+        insert_stmt = self._insert_stmt
         while not g_stop_now:
-            items = self._queue.get(block=True, timeout=STOP_TIMEOUT)
-            if len(items) > 0:
+            try:
+                batch = [self._queue.get(block=True, timeout=STOP_TIMEOUT)]
+            except queue.Empty:
+                continue
+            # Insert everything that is waiting in one transaction, rather
+            # than committing each message
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [items for items in batch if len(items) > 0]
+            if batch:
                 n = self._log_num
-                self._db.executemany(self._insert_stmt,
-                                     ((n, k, v) for k, v in items))
-                self._db.commit()
-                self._log_num += 1
+                rows = [(n + i, k, v) for i, items in enumerate(batch)
+                        for k, v in items]
+                with self._db:
+                    self._db.executemany(insert_stmt, rows)
+                self._log_num = n + len(batch)
         g_stop_ack = True
 
 
-class NullMutex(object):
-    """Null pattern for a mutex"""
-
-    def acquire(self):
-        return True
-
-    def release(self):
-        return
-
-
 class SocketLogger(BaseLogger):
     """Send log messages over a socket.
 
     Yes, there is a SocketHandler in the logging package, but it is a
     dumb-ss about forcing every message to be pickled and unpickled -- much easier
     to just write the messages in a stream over a socket.
+
+    Messages are collected in a buffer and sent together, when the buffer
+    is full or `FLUSH_INTERVAL` seconds after the first one was buffered.
     """
+    # Size of the buffered messages that triggers a send, in bytes
+    SEND_BUFFER_SIZE = 64 * 1024
+    # Longest time a message waits in the buffer, in seconds
+    FLUSH_INTERVAL = 0.01
 
     def __init__(self, host=None, port=None, mutex=None):
         """Connect to server.
 
         :param host: Server host, see TCPClient `host` param
         :param port: Server port, see TCPClient `port` param
-        :param mutex: Mutex to use for thread-safety, may be None
+        :param mutex: Mutex to use for thread-safety. If None, a new lock is
+            used, since the buffer is also sent from a flusher thread.
         :raise: See TCPClient, also ValueError if port is not an int
         """
         kwd = {}
@@ -340,58 +678,85 @@ class SocketLogger(BaseLogger):
         self._client = TCPClient(**kwd)
         self._level = Level.INFO
         self._fmt = LogWriter(fmt=get_log_format())
-        self._mtx = mutex if mutex else NullMutex()
+        self._mtx = mutex if mutex else threading.Lock()
+        self._sendbuf = bytearray()
+        # Set when messages are buffered, and to stop the flusher
+        self._pending = threading.Event()
+        self._closing = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop,
+                                         name="TigresSocketLogger")
+        self._flusher.daemon = True
+        self._flusher.start()
 
     def set_level(self, level):
         self._level = level
 
+    def is_enabled(self, level):
+        return level <= self._level
+
     def log(self, level, name, kvp):
         if level > self._level or self._client is None:
             return
         kvp[Keyword.NAME] = name
-        kvp[Keyword.LEVEL] = self._level
+        kvp[Keyword.LEVEL] = level
         kvp[Keyword.TIME] = time.time()
+        data = self._fmt.format(kvp).encode('utf-8')
         self._mtx.acquire()
         try:
-            s = self._fmt.format(kvp)
-            self._client.send(s)
+            if self._client is None:
+                return
+            self._sendbuf += data
+            if len(self._sendbuf) >= self.SEND_BUFFER_SIZE:
+                self._send()
+            else:
+                self._pending.set()
         finally:
             self._mtx.release()
 
+    def _flush_loop(self):
+        """Send the buffered messages `FLUSH_INTERVAL` seconds after the
+        first one was buffered, until the logger is closed.
+        """
+        pending, closing = self._pending, self._closing
+        while not closing.is_set():
+            pending.wait()
+            # More messages may be buffered meanwhile
+            closing.wait(self.FLUSH_INTERVAL)
+            self._mtx.acquire()
+            try:
+                pending.clear()
+                if self._client is not None:
+                    self._send()
+            finally:
+                self._mtx.release()
+
+    def _send(self):
+        """Send the buffered messages. Call with the mutex held.
+        """
+        if self._sendbuf:
+            buf, self._sendbuf = self._sendbuf, bytearray()
+            self._client.send(bytes(buf))
+
     def close(self):
-        """Close the logger.
+        """Close the logger, after sending any buffered messages.
         """
         if self._client is None:
             return
+        self._closing.set()
+        self._pending.set()
+        if self._flusher is not threading.current_thread():
+            self._flusher.join()
         self._mtx.acquire()
         try:
+            if self._client is None:
+                return
+            self._send()
             del self._client
             self._client = None
         finally:
             self._mtx.release()
 
 
-class LogFormatter(logging.Formatter):
-    def __init__(self):
-        logging.Formatter.__init__(self,
-                                   "{}=%(asctime)s level=%(levelname)s %(message)s"
-                                   .format(Keyword.TIME))
-
-    def formatTime(self, record, *args):
-        return datetime.now().isoformat()
-
-
-class JsonFormatter(logging.Formatter):
-    def __init__(self, meta=False):
-        tmpl = '{{"{}": "%(asctime)s", "level": "%(levelname)s", %(message)s}}'
-        if meta:
-            tmpl = "{} {}".format(META_LINE_MARKER, tmpl)
-        logging.Formatter.__init__(self, tmpl.format(Keyword.TIME))
-
-    def formatTime(self, record, *args):
-        return datetime.now().isoformat()
-
-
 class UUID:
     """UUID wrapper.
     """
@@ -403,11 +768,16 @@ class UUID:
 
     def encode(self, short=False):
         if short:
-            digits, (num, rem) = [], divmod(self._u.int, self.base)
-            while num:
-                digits.insert(0, self.symbols[rem])
-                num, rem = divmod(num, self.base)
-            s = self.symbols[rem] + ''.join(digits)
+            # Digits from the least significant, reversed at the end
+            symbols, base = self.symbols, self.base
+            digits, num = [], self._u.int
+            while True:
+                num, rem = divmod(num, base)
+                digits.append(symbols[rem])
+                if not num:
+                    break
+            digits.reverse()
+            s = ''.join(digits)
         else:
             s = str(self._u)
         return s
@@ -421,14 +791,15 @@ class UUID:
 
 
 def _create_name(prefix='', suffix='', body=''):
-    name_format = ''.join(
-        [('', '{prefix}.')[bool(prefix)],
-         '{body}',
-         ('', '.{suffix}')[bool(suffix)]])
     if not body:
         body = UUID().encode(short=True)
-    name = name_format.format(prefix=prefix, body=body, suffix=suffix)
-    return name
+    if prefix and suffix:
+        return '%s.%s.%s' % (prefix, body, suffix)
+    if prefix:
+        return '%s.%s' % (prefix, body)
+    if suffix:
+        return '%s.%s' % (body, suffix)
+    return '%s' % (body,)
 
 
 def _dict_append(d, key, value):
@@ -437,16 +808,14 @@ def _dict_append(d, key, value):
 
     :return: Input dictionary (for chaining).
     """
-    cur = d.get(key, None)
-    if cur:
-        cur.append(value)
-    else:
-        d[key] = [value]
+    d.setdefault(key, []).append(value)
     return d
 
 
-def _init_logger(dest, name, readonly=None):
+def _init_logger(dest, name, readonly=None, parent=None):
     """Called by public init() method.
+
+    :param parent: Logger that also gets the records of a file logger
     """
     parts = parse.urlparse(dest)
     if parts.scheme == 'sqlite':
@@ -462,7 +831,10 @@ def _init_logger(dest, name, readonly=None):
             path = parts.path
 
         if path:
-            log = FileLogger(path, name, mode='r' if readonly else 'a')
+            if not isinstance(parent, FileLogger):
+                parent = None
+            log = FileLogger(path, name, mode='r' if readonly else 'a',
+                             parent=parent)
         else:
             raise ValueError("unknown destination URL format: {}".format(dest))
     return log
@@ -489,6 +861,15 @@ def log_template(name, state, type_='', level=Level.INFO, **kwargs):
     return log_node(level, name, state=state, nodetype=ttype, **kwargs)
 
 
+def log_enabled(level):
+    """Check whether information at `level` would be logged.
+
+    :return: False if the API is not initialized or the level is filtered out
+    :rtype: bool
+    """
+    return _log is not None and _log.is_enabled(level)
+
+
 def log_node(level, name, state=None, nodetype='any', **kwargs):
     """Log information for node.
 
@@ -497,14 +878,12 @@ def log_node(level, name, state=None, nodetype='any', **kwargs):
     """
     if _log is None:
         return False
-    tname = name.replace(' ', '+')
-    kwargs[Keyword.NODETYPE] = nodetype
+    tname = name.replace(' ', '+') if ' ' in name else name
+    kwargs[_KW_NODETYPE] = nodetype
     if state:
-        kwargs[Keyword.STATE] = state
-    if Keyword.PROGRAM_UID not in kwargs:
-        kwargs[Keyword.PROGRAM_UID] = _program_uuid
-    if Keyword.PROGRAM_NAME not in kwargs:
-        kwargs[Keyword.PROGRAM_NAME] = _program_name
+        kwargs[_KW_STATE] = state
+    kwargs.setdefault(_KW_PROGRAM_UID, _program_uuid)
+    kwargs.setdefault(_KW_PROGRAM_NAME, _program_name)
     return _log.log(level, tname, kwargs)
 
 
@@ -566,32 +945,64 @@ class LogStatus(object):
     def __init__(self, rec):
         """Constructor.
 
+        The record time is parsed, and the non-Tigres fields are collected
+        in `meta`, when they are first used, since callers of `check()`
+        mostly look at the state and names of many records.
+
         :param rec: Record
         :type rec: kvp.Record
         """
+        get = rec._fields.get
         self._rec = rec
+        self._timestamp = None
+        self._meta = None
         self.timestr = rec.time_string  # : String representation of time
-        self.timestamp = rec.ts  # : Numeric time in seconds since 1/1/1970
-        self.state = rec.get(Keyword.STATE, State.UNKNOWN)  # : Activity or state
-        self.errcode = int(rec.get(Keyword.STATUS, 0))  # : Error code, 0=OK
-        self.errmsg = rec.get(Keyword.ERROR,
-                              None)  # : Error message. None if no error
-        self.name = rec.get(Keyword.NAME,
-                            'UNKNOWN').replace("+", " ")  # : Name of node, or 'user' for user-created log entries
-        self.template_id = rec.get(Keyword.TMPL_UID,
-                                   None)  # : Identifier for the current template. May be None
-        self.task_id = rec.get(Keyword.TASK_UID,
-                               None)  # : Identifier for the current task. May be None
-        self.work_id = rec.get(
+        self.state = get(Keyword.STATE, State.UNKNOWN)  # : Activity or state
+        self.errcode = int(get(Keyword.STATUS, 0))  # : Error code, 0=OK
+        self.errmsg = get(Keyword.ERROR,
+                          None)  # : Error message. None if no error
+        name = get(Keyword.NAME, 'UNKNOWN')
+        self.name = name.replace("+", " ") if "+" in name else name  # : Name of node, or 'user' for user-created log entries
+        self.template_id = get(Keyword.TMPL_UID,
+                               None)  # : Identifier for the current template. May be None
+        self.task_id = get(Keyword.TASK_UID,
+                           None)  # : Identifier for the current task. May be None
+        self.work_id = get(
             Keyword.WORK_UID)  # : Identifier for the current state being don
-        self.program_id = rec.get(Keyword.PROGRAM_UID,
-                                   None)  # : Identifier for the current program. May be None
-        self.program_name = rec.get(Keyword.PROGRAM_NAME,
-                                   None)  # : Name for the current program. May be None
-        self.node_type = rec.get(Keyword.NODETYPE,
-                                   None)  # : Node type. May be None
-        self.meta = {k: v for k, v in list(rec._fields.items()) if
-                     not k.startswith(Keyword.pfx)}
+        self.program_id = get(Keyword.PROGRAM_UID,
+                              None)  # : Identifier for the current program. May be None
+        self.program_name = get(Keyword.PROGRAM_NAME,
+                                None)  # : Name for the current program. May be None
+        self.node_type = get(Keyword.NODETYPE,
+                             None)  # : Node type. May be None
+
+    @property
+    def timestamp(self):
+        """Numeric time in seconds since 1/1/1970
+        """
+        if self._timestamp is None:
+            self._timestamp = self._rec.ts
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value):
+        self._timestamp = value
+
+    @property
+    def meta(self):
+        """Fields of the record that are not Tigres keywords
+        """
+        if self._meta is None:
+            # The time in the fields is numeric once it is parsed
+            self.timestamp
+            pfx = Keyword.pfx
+            self._meta = {k: v for k, v in self._rec._fields.items() if
+                          not k.startswith(pfx)}
+        return self._meta
+
+    @meta.setter
+    def meta(self, value):
+        self._meta = value
 
     def __getitem__(self, key):
         """Get a value from the record.
@@ -643,7 +1054,8 @@ def init(dest, program_name='', program_uuid='', user_dest=None,
     :param dest: Destination URL for Tigres logs.
     :param user_dest: Destination URL for user-generated logs.
         If not given, `dest` will be used for both.
-    :param format: Format for file logs, one of the LOG_FORMAT_* constants
+    :param format: Format for file logs, one of the LOG_FORMAT_* constants.
+        LOG_FORMAT_MSGPACK needs the msgspec package.
     :type format: str
     :param host: User-provided host addr (skip DNS lookup)
     :type host: str
@@ -661,6 +1073,10 @@ def init(dest, program_name='', program_uuid='', user_dest=None,
     _program_uuid = program_uuid
     if host is not None:
         set_host_address(host)
+    else:
+        # Look up the address while the program runs, it is ready by the
+        # time host context is logged
+        _start_host_address_lookup()
     set_log_format(format)
     if _log is not None or _ulog is not None:
         finalize()
@@ -668,7 +1084,8 @@ def init(dest, program_name='', program_uuid='', user_dest=None,
         raise ValueError("destination URL cannot be empty")
     _log = _init_logger(dest, 'tigres', readonly=readonly)
     if user_dest:
-        _ulog = _init_logger(user_dest, 'tigres.user')
+        # User records are also written to the Tigres log
+        _ulog = _init_logger(user_dest, 'tigres.user', parent=_log)
     else:
         _ulog = _log
     _log_readonly = readonly
@@ -684,7 +1101,8 @@ def finalize():
     the top-level tigres `start()` with a log destination keyword.
     The top-level `end()` call will invoke this function for you.
     """
-    global g_stop_now, _log, _ulog
+    global g_stop_now, _log, _ulog, _node_index
+    _node_index = None
     if _log is None and _ulog is None:
         return
     g_stop_now = 1
@@ -751,15 +1169,144 @@ def write(level, activity, message=None, **kwd):
     kwd[Keyword.EVENT] = activity
     if message is not None:
         kwd[Keyword.MESSAGE] = message
-    if Keyword.PROGRAM_UID not in kwd:
-        kwd[Keyword.PROGRAM_UID] = _program_uuid
-    if Keyword.PROGRAM_NAME not in kwd:
-        kwd[Keyword.PROGRAM_NAME] = _program_name
+    kwd.setdefault(_KW_PROGRAM_UID, _program_uuid)
+    kwd.setdefault(_KW_PROGRAM_NAME, _program_name)
 
     # Log the information
     _ulog.log(level, 'user', kwd)
 
 
+# Values that are written unchanged in every log format, so that records
+# can be skipped if they do not contain them
+_LITERAL_VALUE = re.compile(r'^[A-Za-z0-9_.:+-]+$')
+
+
+def _literal_values(*values):
+    """The values that can be looked for in the unparsed records.
+
+    :return: Values that are written as they are in JSON and name=value records
+    :rtype: list of str
+    """
+    return [v for v in values
+            if isinstance(v, str) and _LITERAL_VALUE.match(v)]
+
+
+def _combine_patterns(patterns):
+    """Combine compiled patterns into one alternation, so that a name is
+    matched against all of them with one call. Patterns with groups, which
+    would be renumbered, or that cannot be combined are kept apart.
+
+    :param patterns: Compiled patterns
+    :type patterns: list
+    :return: Patterns; a name matches one of them if it matched one of the inputs
+    :rtype: list
+    """
+    if len(patterns) < 2 or any(p.groups for p in patterns):
+        return patterns
+    try:
+        return [re.compile('|'.join('(?:{})'.format(p.pattern)
+                                    for p in patterns))]
+    except re.error:
+        return patterns
+
+
+class _NodeIndex(object):
+    """Node records of a text log file, read as the file grows.
+
+    :func:`check` only looks at records with a node type and a name. They
+    are kept with the offset the file was read up to, so that each call
+    only parses the records appended since the previous one. The metadata
+    lines are kept too, and read again before the new records so that
+    their format is known. MessagePack logs are not indexed.
+    """
+    _REQUIRED = (Keyword.NODETYPE, Keyword.NAME)
+    _LINE_META = b'\n' + META_LINE_MARKER_BYTES
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._meta = b''
+        self._records = []
+        self._indexed = True
+
+    def records(self):
+        """Read the records appended since the last call.
+
+        :return: The node records in log order, or None if the log
+            is not indexed
+        :rtype: list of Record or None
+        :raise: ValueError on a bad record
+        """
+        with self._lock:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < self._offset:
+                    # The log was truncated or replaced
+                    self._reset()
+                if not self._indexed:
+                    return None
+                records = self._records
+                count = len(records)
+                offset, meta = self._offset, self._meta
+                f.seek(offset)
+                # The file is parsed a block at a time. The part of a line
+                # at the end of a block is kept for the next block, or read
+                # by the next call if it is still being written.
+                rest = b''
+                while True:
+                    block = f.read(READ_BUFFER_SIZE)
+                    if not block:
+                        break
+                    if offset == 0 and not rest and block[:1] == b'\0':
+                        # MessagePack records start with a zero byte
+                        self._indexed = False
+                        return None
+                    data = rest + block
+                    end = data.rfind(b'\n') + 1
+                    if not end:
+                        rest = data
+                        continue
+                    chunk, rest = data[:end], data[end:]
+                    try:
+                        records.extend(Reader(io.BytesIO(meta + chunk),
+                                              required=self._REQUIRED))
+                    except ValueError as err:
+                        del records[count:]
+                        raise ValueError("Record {:d}: {}".format(
+                            len(records) + 1, err))
+                    meta += self._meta_lines(chunk)
+                    offset += end
+            self._offset, self._meta = offset, meta
+            return records[:]
+
+    def _meta_lines(self, chunk):
+        """The metadata lines in a chunk of whole lines.
+        """
+        lines = []
+        marker = self._LINE_META
+        # Every metadata line, the first one included, follows a newline
+        text = b'\n' + chunk
+        pos = text.find(marker)
+        while pos >= 0:
+            end = text.index(b'\n', pos + 1) + 1
+            lines.append(text[pos + 1:end])
+            pos = text.find(marker, end - 1)
+        return b''.join(lines)
+
+
+def _node_records(path):
+    """The node records of the log at `path`, see :class:`_NodeIndex`.
+    """
+    global _node_index
+    index = _node_index
+    if index is None or index.path != path:
+        index = _node_index = _NodeIndex(path)
+    return index.records()
+
+
 def check(nodetype, **kwargs):
     """Get status of a task or template (etc.).
 
@@ -810,22 +1357,34 @@ def check(nodetype, **kwargs):
                 name = '.*' + name
             name_filters.append(re.compile(name))
 
-    def fltr(rec):
+    # The filter values are looked up once, not for every record
+    state_want = kwargs['state'] if check_state else None
+    template_want = in_template_id.replace(" ", "+") if in_template_id else None
+    name_matchers = [nf.match for nf in _combine_patterns(name_filters)]
+    # The filters are usually combined into one pattern, which is
+    # matched without going through any()
+    name_match = name_matchers[0] if len(name_matchers) == 1 else None
 
-        if in_program_id and not in_program_id == rec.get(Keyword.PROGRAM_UID, None):
+    def fltr(rec):
+        get = rec._fields.get
+        if in_program_id and not in_program_id == get(Keyword.PROGRAM_UID):
             return False
-        if rec.get(Keyword.NODETYPE, None) is None or rec.get(Keyword.NAME, None) is None:
+        rec_nodetype = get(Keyword.NODETYPE)
+        rec_name = get(Keyword.NAME)
+        if rec_nodetype is None or rec_name is None:
             return False
-        if check_nodetype and not rec.get(Keyword.NODETYPE, None).startswith(nodetype):
+        if check_nodetype and not rec_nodetype.startswith(nodetype):
             return False
-        if in_template_id and not in_template_id.replace(" ", "+") == rec.get(Keyword.TMPL_UID, None):
+        if template_want and not template_want == get(Keyword.TMPL_UID):
             return False
         if check_state:
-            log_state = rec.get(Keyword.STATE, None)
-            if log_state is not None and kwargs['state'] != log_state:
+            log_state = get(Keyword.STATE)
+            if log_state is not None and state_want != log_state:
                 return False
-        if name_filters:
-            return any([nf.match(rec.get(Keyword.NAME, "")) for nf in name_filters])
+        if name_match is not None:
+            return name_match(rec_name) is not None
+        if name_matchers:
+            return any(match(rec_name) for match in name_matchers)
         else:
             return True
 
@@ -835,23 +1394,37 @@ def check(nodetype, **kwargs):
     keylist = [Keyword.NODETYPE]
     keylist.append(Keyword.NAME)
     keylist.append(node_id_key)
+    def keep(rec):
+        if fltr(rec):
+            key = '#'.join([rec.get(k, '') for k in keylist])
+            if multiple:
+                # keep a list per name
+                _dict_append(result, key, rec)
+            else:
+                # keep only 1 per name
+                result[key] = rec
+
     if _log and _log.is_file:  # XXX: Put this logic in BaseLogger subclasses
-        with open(_log.path, 'rb') as f:
-            linenum = 1
-            try:
-                for rec in Reader(f):
-                    if fltr(rec):
-                        key = '#'.join([rec.get(k, '') for k in keylist])
-                        if multiple:
-                            # keep a list per name
-                            _dict_append(result, key, rec)
-                        else:
-                            # keep only 1 per name
-                            result[key] = rec
-                    linenum += 1
-            except ValueError as err:
-                # add line number to error before re-raising
-                raise ValueError("Line {:d}: {}".format(linenum, err))
+        _log.flush()
+        records = _node_records(_log.path)
+        if records is not None:
+            for rec in records:
+                keep(rec)
+        else:
+            # Records without these are rejected by the filter, so they are
+            # skipped before being parsed
+            required = _literal_values(Keyword.NODETYPE, Keyword.NAME,
+                                       in_program_id,
+                                       nodetype if check_nodetype else None)
+            with open(_log.path, 'rb') as f:
+                linenum = 1
+                try:
+                    for rec in Reader(f, required=required):
+                        keep(rec)
+                        linenum += 1
+                except ValueError as err:
+                    # add line number to error before re-raising
+                    raise ValueError("Line {:d}: {}".format(linenum, err))
     else:
         raise NotImplementedError(
             'Only know how to search files, not {}'.format(_log.path))
@@ -908,7 +1481,8 @@ def find(name=None, states=None, activity=None, template_id=None, task_id=None,
     if activity:
         log_states[activity] = True
     if _log and _log.is_file:  # XXX: Put this logic in BaseLogger subclasses
-        reader = Reader(_log.path)
+        _log.flush()
+        reader = Reader(_log.path, required=_literal_values(name))
         for rec in reader:
             # check name
             if name and not (rec.get(Keyword.NAME, None) == name):
@@ -929,6 +1503,32 @@ def find(name=None, states=None, activity=None, template_id=None, task_id=None,
     return result
 
 
+# Maximum number of built queries kept, by their expressions
+QUERY_CACHE_SIZE = 256
+_queries = {}
+
+
+def _build_query(spec):
+    """Build the query for a list of expressions once, for all the calls
+    with the same expressions. Queries with dates relative to the current
+    time are built every time.
+
+    :param spec: Query expressions
+    :type spec: tuple of str
+    :rtype: search.Query
+    :raise: ValueError
+    """
+    qry = _queries.get(spec)
+    if qry is None:
+        exprs = [search.Expr(e) for e in spec]
+        qry = search.Query(clauses=[search.Clause(exprs=exprs)])
+        if not any(e.is_relative for e in exprs):
+            if len(_queries) >= QUERY_CACHE_SIZE:
+                _queries.clear()
+            _queries[spec] = qry
+    return qry
+
+
 def query(spec=None, fields=None):
     """Find and return log records based on a list of filter expressions.
 
@@ -959,25 +1559,31 @@ def query(spec=None, fields=None):
     :rtype: list of Record
     :raise: BuildQueryError, ValueError
     """
-    if not spec: spec = []
+    # Not appended to the caller's list
+    spec = tuple(spec) if spec else ()
     if _program_uuid:
-        spec.append("{} = {}".format(Keyword.PROGRAM_UID, _program_uuid))
+        spec += ("{} = {}".format(Keyword.PROGRAM_UID, _program_uuid),)
 
     if not fields: fields = []
     if _log is None:
         raise NotInitializedError("query")
     try:
-        clause = search.Clause(exprs=list(map(search.Expr, spec)))
-        qry = search.Query(clauses=[clause])
+        qry = _build_query(spec)
     except ValueError as err:
         raise BuildQueryError(err)
     if _log.is_file:
+        _log.flush()
         qobj = search.LogFile(_log.path)
-        for rec in qobj.query(qry):
-
-            if fields:
-                rec = rec.project(fields, copy=True)
-            yield rec
+        if fields:
+            # Each record is read fresh from the file, so it is projected
+            # in place instead of being copied
+            fields = frozenset(fields)
+            for rec in qobj.query(qry):
+                rec.project(fields, copy=False)
+                yield rec
+        else:
+            for rec in qobj.query(qry):
+                yield rec
     else:
         raise NotImplementedError(
             'Only know how to search files, not {}'.format(_log.path))
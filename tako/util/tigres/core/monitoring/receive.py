@@ -299,8 +299,13 @@ class TCPClient(object):
 
     def send(self, data):
         """Send data to server.
+
+        :param data: Text, which is sent UTF-8 encoded, or bytes
+        :type data: str or bytes
         """
-        self._conn.send(data.encode('utf-8'))
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        self._conn.sendall(data)
 
     def close(self):
         self._conn.close()
@@ -28,9 +28,210 @@ from tigres.core.monitoring import common, kvp
 __author__ = 'Dan Gunter <dkgunter@lbl.gov>'
 __date__ = '4/9/13'
 
+import functools
 import re
 # package imports
 
+# Maximum number of compiled '~' patterns kept
+PATTERN_CACHE_SIZE = 512
+_patterns = {}
+
+
+def _compiled(pattern):
+    """Compile a regular expression once, for all records and queries.
+
+    :param pattern: Regular expression
+    :type pattern: str
+    :return: Compiled expression
+    """
+    regex = _patterns.get(pattern)
+    if regex is None:
+        if len(_patterns) >= PATTERN_CACHE_SIZE:
+            _patterns.clear()
+        regex = _patterns[pattern] = re.compile(pattern)
+    return regex
+
+
+# Field names and values that are written as they are in the log records
+_LITERAL = re.compile(r'^[A-Za-z0-9_.:+-]+$')
+# Characters of a regular expression that match themselves, and that are
+# written as they are in the log records
+_LITERAL_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+                           '0123456789_:- ')
+
+
+# A '{' that starts a quantifier, any other '{' is a literal character
+_QUANTIFIER = re.compile(r'\{(?:\d+(?:,\d*)?|,\d*)\}')
+
+
+def _required_literal(pattern):
+    """Find text that every string matched by a regular expression contains.
+
+    Only characters outside of groups and classes are used, and a
+    character made optional by a quantifier is left out. Patterns with
+    alternatives or inline flags have no required text.
+
+    >>> _required_literal('x{1000}') is None
+    True
+    >>> _required_literal(r'code\\d{12}end')
+    'code'
+    >>> _required_literal(r'\\x41bc')
+    'bc'
+    >>> _required_literal(r'(a)\\1zz')
+    'zz'
+    >>> _required_literal('a{b(c}d)?')
+    'a'
+    >>> _required_literal('ab{(x}yz)?')
+    'ab'
+    >>> _required_literal('x{[}zz]')
+    'x'
+
+    :param pattern: Regular expression
+    :type pattern: str
+    :return: The longest required text, or None
+    :rtype: str or None
+    """
+    if '|' in pattern or '(?' in pattern:
+        return None
+    runs, run = [], []
+    depth, in_class = 0, False
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if in_class:
+            if c == '\\':
+                i += 1
+            elif c == ']':
+                in_class = False
+        elif c in '?*' or (c == '{' and _QUANTIFIER.match(pattern, i)):
+            # The previous character may not be there
+            if run:
+                run.pop()
+            runs.append(''.join(run))
+            run = []
+            if c == '{':
+                # The counts of the quantifier are not text
+                i = pattern.index('}', i)
+        elif depth == 0 and c in _LITERAL_CHARS:
+            run.append(c)
+        else:
+            runs.append(''.join(run))
+            run = []
+            if c == '\\':
+                i = _escape_end(pattern, i) - 1
+            elif c == '[':
+                in_class = True
+                # A ']' first in the class is part of it
+                if pattern[i + 1:i + 2] == '^':
+                    i += 1
+                if pattern[i + 1:i + 2] == ']':
+                    i += 1
+            elif c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+        i += 1
+    runs.append(''.join(run))
+    return max(runs, key=len) or None
+
+
+# Number of characters after '\\x', '\\u' and '\\U' in an escape
+_ESCAPE_DIGITS = {'x': 2, 'u': 4, 'U': 8}
+
+
+def _escape_end(pattern, i):
+    """Find the end of the escape that starts with the backslash at `i`,
+    including the digits of character codes, octal escapes and back
+    references.
+
+    :return: Index after the escape
+    :rtype: int
+    """
+    i += 1
+    c = pattern[i:i + 1]
+    i += 1
+    if c in _ESCAPE_DIGITS:
+        i += _ESCAPE_DIGITS[c]
+    elif c == 'N' and pattern[i:i + 1] == '{':
+        i = pattern.find('}', i) + 1 or len(pattern)
+    elif c.isdigit():
+        # Octal escapes and back references; digits after them, which
+        # would be text, are skipped too
+        while i < len(pattern) and pattern[i].isdigit():
+            i += 1
+    return i
+
+
+# Back references, which would refer to other groups once combined
+_BACKREF = re.compile(r'\\[1-9]')
+
+
+def _combine_regex_exprs(exprs):
+    """Combine the '~' expressions of an OR clause that test the same field
+    into one alternation, so that a value is matched with one call.
+    Patterns with back references or inline flags, or that cannot be
+    combined, are kept apart.
+
+    :param exprs: Expressions of the clause
+    :type exprs: list of Expr
+    :return: Expressions; a record matches one of them if it matched one
+        of the inputs
+    :rtype: list of Expr
+    """
+    by_field, result = {}, []
+    for expr in exprs:
+        value = expr.value
+        if (expr.is_regex and '(?' not in value and
+                not _BACKREF.search(value)):
+            if expr.field not in by_field:
+                by_field[expr.field] = []
+                result.append(by_field[expr.field])
+            by_field[expr.field].append(expr)
+        else:
+            result.append(expr)
+    combined = []
+    for item in result:
+        if not isinstance(item, list):
+            combined.append(item)
+            continue
+        if len(item) > 1:
+            pattern = '|'.join('(?:{})'.format(e.value) for e in item)
+            try:
+                _compiled(pattern)
+                expr = Expr('{} ~ {}'.format(item[0].field, pattern))
+            except (re.error, ValueError):
+                expr = None
+            if expr is not None and expr.is_regex:
+                combined.append(expr)
+                continue
+        combined.extend(item)
+    return combined
+
+
+def _any_required(exprs):
+    """Text of which a log record matching any of the expressions of an
+    OR clause contains at least one, the longest required text of each.
+
+    >>> _any_required([Expr('code ~ x{1000}'), Expr(r'msg ~ \\x41ny{2,3}')])
+    ('code', 'msg')
+    >>> _any_required([Expr('code ~ x{1000}'), Expr('msg ~ .*')])
+    ('code', 'msg')
+    >>> _any_required([Expr('c ~ ab{(x}yzzz)?'), Expr('m ~ x{[}zzz]')])
+    ('ab', 'm')
+    >>> _any_required([Expr('code ~ x{1000}'), Expr('ts > 2013-04-09')])
+
+    :param exprs: Expressions of the clause
+    :type exprs: list of Expr
+    :return: Required text, or None if an expression has none
+    :rtype: tuple of str or None
+    """
+    texts = []
+    for expr in exprs:
+        if not expr.required:
+            return None
+        texts.append(max(expr.required, key=len))
+    return tuple(texts)
+
 
 class Query(object):
     """A query built of clauses.
@@ -83,7 +284,8 @@ class Expr(object):
         oper_str = parts[1]
         self._val = parts[2]
         # if val is a date, then parse it and optionally modify operator
-        _, mdate = parse.guess(self._val, try_num=False)
+        fmt, mdate = parse.guess(self._val, try_num=False)
+        self._relative = fmt == parse.ENGLISH
         if mdate is not None:
             self._val = mdate
             if self._field != common.Keyword.TIME:
@@ -95,6 +297,26 @@ class Expr(object):
                 "Cannot compare non-date to timestamp field ({}): {}".format(
                     self._field, self._val))
         self._op = Oper(oper_str)
+        self._is_regex = oper_str == '~'
+        self._required = self._required_text(oper_str)
+
+    def _required_text(self, oper_str):
+        """Text that the unparsed log record must contain to match.
+        """
+        required = []
+        if self._field in kvp.Record.AUTO_FIELDS:
+            # Their values are converted, and dates are parsed, so the
+            # text of the record is not compared
+            return ()
+        if _LITERAL.match(self._field):
+            required.append(self._field)
+        if oper_str == '~':
+            literal = _required_literal(self._val)
+            if literal:
+                required.append(literal)
+        elif oper_str == '=' and _LITERAL.match(self._val):
+            required.append(self._val)
+        return tuple(required)
 
     @property
     def field(self):
@@ -108,6 +330,27 @@ class Expr(object):
     def value(self):
         return self._val
 
+    @property
+    def is_relative(self):
+        """Whether the value is a date parsed relative to the current
+        time, e.g. 'now' or 'today'.
+        """
+        return self._relative
+
+    @property
+    def is_regex(self):
+        """Whether the value is matched with the '~' operator.
+        """
+        return self._is_regex
+
+    @property
+    def required(self):
+        """Text found in every unparsed log record that matches.
+
+        :rtype: tuple of str
+        """
+        return self._required
+
 
 class Oper(object):
     """Operator in an expression, e.g. '=' or '~'.
@@ -133,6 +376,7 @@ class Oper(object):
         n = self._opname.get(strval, None)
         if n is None:
             raise ValueError("unknown operator '{}'".format(strval))
+        self._name = n
         self._opfn = getattr(self, '_compare_{}'.format(n))
         self._must_be_numeric = not n.endswith('eq')
 
@@ -154,6 +398,42 @@ class Oper(object):
                 return False  # Not a number; exception?
         return self._opfn(lhs, rhs)
 
+    def predicate(self, rhs):
+        """Bind the right-hand side of the comparison, which is the same
+        for every record of a query. The value is converted, or the
+        pattern compiled, once instead of for every record.
+
+        :return: Function of the left-hand side, as `compare(lhs, rhs)`
+        :rtype: function
+        """
+        opfn = self._opfn
+        try:
+            if self._rhs_date:
+                _, rhs_d = parse.guess(rhs)
+            elif self._must_be_numeric:
+                rhs_n = self._number(rhs)
+            elif self._name == 'req':
+                return _compiled(rhs).match
+        except Exception:
+            # Let compare() fail for each record, as it would have
+            return functools.partial(self.compare, rhs=rhs)
+        if self._rhs_date:
+            if rhs_d is None:
+                return _never
+            return lambda lhs: opfn(lhs, rhs_d)
+        elif self._must_be_numeric:
+            if rhs_n is None:
+                return _never
+            number = self._number
+
+            def compare_number(lhs):
+                lhs = number(lhs)
+                if lhs is None:
+                    return False
+                return opfn(lhs, rhs_n)
+            return compare_number
+        return lambda lhs: opfn(lhs, rhs)
+
     def _number(self, v):
         try:
             x = int(v)
@@ -204,7 +484,13 @@ class Oper(object):
         """Compare the string value, A, with the regular expression B,
         and return whether B matches A.
         """
-        return re.match(rhs, lhs)
+        return _compiled(rhs).match(lhs)
+
+
+def _never(lhs):
+    """Comparison with a right-hand side that nothing matches
+    """
+    return False
 
 
 class Queryable(object):
@@ -227,22 +513,55 @@ class LogFile(Queryable):
     """
 
     def __init__(self, path):
-        self._f = open(path)
+        self._path = path
 
     def query(self, qry):
-        for rec in kvp.Reader(self._f):
-            ok = True
-            for clause in qry:
-                if clause.is_and():
-                    passed = all((self._match(expr, rec) for expr in clause))
-                else:
-                    passed = any((self._match(expr, rec) for expr in clause))
-                if not passed:
-                    ok = False
+        # Text records without what an AND clause requires, or without
+        # text that one of the expressions of an OR clause requires,
+        # cannot match, they are skipped before being parsed
+        required = []
+        required_any = []
+        clauses = []
+        for clause in qry:
+            exprs = list(clause)
+            if clause.is_and() or len(exprs) == 1:
+                for expr in exprs:
+                    required.extend(expr.required)
+            else:
+                texts = _any_required(exprs)
+                if texts:
+                    required_any.append(texts)
+                exprs = _combine_regex_exprs(exprs)
+            # The values compared with are bound once for the query
+            tests = [(expr.field, expr.op.predicate(expr.value))
+                     for expr in exprs]
+            clauses.append((clause.is_and(), tests))
+        # The reader opens the file, which lets it tell text logs from
+        # MessagePack logs
+        for rec in kvp.Reader(self._path, required=required,
+                              required_any=required_any):
+            for is_and, tests in clauses:
+                if not self._passes(rec, is_and, tests):
                     break
-            if ok:
+            else:
                 yield rec
 
+    @staticmethod
+    def _passes(rec, is_and, tests):
+        """Whether the record passes all (AND) or any (OR) of the tests.
+        """
+        for field, test in tests:
+            try:
+                r = field in rec and test(rec[field])
+            except TypeError:
+                r = False
+            if not r:
+                if is_and:
+                    return False
+            elif not is_and:
+                return True
+        return is_and
+
     def _match(self, expr, rec):
         r = False
         try:
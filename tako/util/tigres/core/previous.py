@@ -12,7 +12,7 @@
 
 
 """
-import inspect
+import sys
 
 from tigres.core.state.program import Program
 from tigres.core.utils import get_metaclass
@@ -26,42 +26,79 @@ class _PreviousMeta(type):
     # special attributes
     I = "i"
 
+    # Tasks or templates registered by name with :meth:`register`, with
+    # the program they were registered in
+    _registry = {}
+
+    def register(cls, name, work):
+        """
+        Register a task or template under the given name so that
+        ``PREVIOUS.name`` resolves it without inspecting the caller's frames.
+        The name is forgotten once the current program ends.
+
+        :param name: the attribute name used in the PREVIOUS syntax
+        :type name: str
+        :param work: the task or template the name refers to
+        :return: None
+        """
+        cls._registry[name] = (getattr(Program, '_instance', None), work)
+
+    def unregister(cls, name):
+        """
+        Remove a name registered with :meth:`register`
+
+        :param name: the attribute name used in the PREVIOUS syntax
+        :type name: str
+        :return: None
+        """
+        cls._registry.pop(name, None)
+
     def __getattr__(cls, item):
         """
         Class level get attribute. Determines if
-        the item is a local variable.
+        the item is a registered name or a local variable.
 
         :param item: the attribute that represents a task or template
         :return: new instance of PREVIOUS
         """
 
         previous = PREVIOUS()
-        if item == _PreviousMeta.I:
+        work = None
+        entry = cls._registry.get(item)
+        if entry is not None:
+            program, work = entry
+            if program is not getattr(Program, '_instance', None):
+                # Registered in a program that has ended
+                cls._registry.pop(item, None)
+                work = None
+        if work is not None:
+            # Fast path: pre-registered name, no frame inspection needed
+            previous._work = work
+            previous._work_name = work.unique_name
+        elif item == _PreviousMeta.I:
             # sets _i to True
             # noinspection PyStatementEffect,PyStatementEffect
             previous.i
         else:
-            previous.__dict__['_work_name'] = item
+            previous._work_name = item
 
             # Find the task in the local variables
-            _, _, _, localz = inspect.getargvalues(
-                inspect.currentframe().f_back)
+            localz = sys._getframe(1).f_locals
             named_variable = cls._find_named_variable(localz, item)
             # need to go back one frame to see if we can find the variable name
             if not named_variable:
                 # noinspection PyBroadException
                 try:
-                    _, _, _, localz = inspect.getargvalues(
-                        inspect.currentframe().f_back.f_back)
+                    localz = sys._getframe(2).f_locals
                     named_variable = cls._find_named_variable(localz, item)
                 except:
                     #do nothing
                     pass
             if named_variable:
-                previous.__dict__['_work'] = localz[item]
-                previous.__dict__['_work_name'] = localz[item].unique_name
+                previous._work = named_variable
+                previous._work_name = named_variable.unique_name
             else:
-                previous.__dict__['_work'] = None
+                previous._work = None
         return previous
 
     @staticmethod
@@ -73,9 +110,9 @@ class _PreviousMeta(type):
         :param localz: ArgsSpec
         :param variable_name: The name of the variable to look for
         """
-        if variable_name in localz:
-            if hasattr(localz[variable_name], 'name'):
-                return localz[variable_name]
+        variable = localz.get(variable_name)
+        if getattr(variable, 'name', None) is not None:
+            return variable
         return None
 
 
@@ -98,17 +135,21 @@ class PREVIOUS(get_metaclass(_PreviousMeta, 'PREVIOUSMeta')):
        | Match the i-th output of the previous task/template to the i-th InputValues of the task to be run.  This only works for parallel tasks.
      * ``PREVIOUS.taskOrTemplateName.i[n]`` Use the n-th output of the previous task or template as input.
 
+    Names are resolved from the caller's local variables. Names registered with
+    ``PREVIOUS.register(name, task)`` are resolved directly, which avoids inspecting
+    the caller's frames.
 
 
     """
 
+    __slots__ = ('_i', '_index', '_task', '_work_name', '_work', '_str_cache')
+
     def __init__(self):
 
-        # Inspect the stack
+        # Inspect the calling frame
         # Raise exception if instantiated outside of tigres.core
-        frm = inspect.stack()[1]
-        mod = inspect.getmodule(frm[0])
-        if not mod.__name__.startswith("tigres.core"):
+        module_name = sys._getframe(1).f_globals.get('__name__', '')
+        if not module_name.startswith("tigres.core"):
             raise PreviousSyntaxError("PREVIOUS may not be instantiated")
 
         # Initialize variables
@@ -116,9 +157,15 @@ class PREVIOUS(get_metaclass(_PreviousMeta, 'PREVIOUSMeta')):
         self._index = None
         self._task = None
         self._work_name = None
+        self._work = None
+        self._str_cache = None
 
     def _get_work(self, program):
         work_list = program.get_work_by_name(self._work_name)
+        if not work_list:
+            raise PreviousSyntaxError(
+                "Cannot find the inputs for {0:s}. There is no task or "
+                "template with that name.".format(str(self)))
         if len(work_list) > 1:
             # Don't know what to do with multiple instances of this name.
             raise PreviousSyntaxError(
@@ -126,9 +173,29 @@ class PREVIOUS(get_metaclass(_PreviousMeta, 'PREVIOUSMeta')):
                     str(self), len(work_list)))
         return program._work[work_list[0]]
 
-    def __call__(self, index=0):
+    @staticmethod
+    def _previous(program, cache):
+        """
+        Return the previous work and its results. When a cache is given they
+        are looked up once and shared by every call that uses the cache.
+        """
+        if cache:
+            return cache['work'], cache['results']
+        previous_work = program.previous_work
+        previous_results = previous_work.results
+        if cache is not None:
+            cache['work'] = previous_work
+            cache['results'] = previous_results
+        return previous_work, previous_results
+
+    def __call__(self, index=0, cache=None):
         """
         Return the previous results
+
+        :param index: index of the work the inputs are for (Syntax: PREVIOUS.i)
+        :param cache: dictionary shared by a batch of calls so that the
+            previous work and its results are only looked up once
+        :type cache: dict or None
         """
         # Get the Tigres Program
         program = Program()
@@ -139,17 +206,18 @@ class PREVIOUS(get_metaclass(_PreviousMeta, 'PREVIOUSMeta')):
             # Syntax: PREVIOUS.task_name
             return self._get_work(program).results
         elif not self._work_name and self._i:
+            previous_work, previous_results = self._previous(program, cache)
             if self._index is not None:
                 # Syntax: PREVIOUS.i[n]
-                return program.previous_work.results[self._index]
+                return previous_results[self._index]
                 # Syntax: PREVIOUS.i
             else:
-                if len(program.previous_work.results) < index + 1:
+                if len(previous_results) < index + 1:
                     raise PreviousSyntaxError(
                         "PREVIOUS.{{name}}.i ERROR - cannot find the input for index {0:d} and previous state  {1:s}".format(
                             index,
-                            program.previous_work.name))
-                return program.previous_work.results[index]
+                            previous_work.name))
+                return previous_results[index]
         elif self._work_name and self._i:
             if self._index is not None:
                 # Syntax: PREVIOUS.task_name.i[n]
@@ -158,23 +226,27 @@ class PREVIOUS(get_metaclass(_PreviousMeta, 'PREVIOUSMeta')):
             else:
                 # Syntax: PREVIOUS.task_name.i
                 prev_work = self._get_work(program)
-                if len(prev_work.results) < index + 1:
+                prev_results = prev_work.results
+                if len(prev_results) < index + 1:
                     raise PreviousSyntaxError(
                         "PREVIOUS.{{name}}.i ERROR - cannot find the input for index {0:d} and previous state  {1:s}".format(
                             index,
                             prev_work.name))
-                return self._get_work(program).results[index]
+                return prev_results[index]
 
     def __str__(self):
-        s = "PREVIOUS"
-        if self._work_name:
-            s += "." + self._work_name
-        if self._i:
-            s += ".i"
-        if self._index:
-            s += "[{}]".format(self._index)
+        if self._str_cache is None:
+            parts = ["PREVIOUS"]
+            if self._work_name:
+                parts.append(".")
+                parts.append(self._work_name)
+            if self._i:
+                parts.append(".i")
+            if self._index:
+                parts.append("[{}]".format(self._index))
+            self._str_cache = "".join(parts)
 
-        return s
+        return self._str_cache
 
     __repr__ = __str__
 
@@ -191,6 +263,7 @@ class PREVIOUS(get_metaclass(_PreviousMeta, 'PREVIOUSMeta')):
                 raise PreviousSyntaxError(
                     "Invalid use of .i syntax for {}".format(str(self)))
             self._i = True
+            self._str_cache = None
         else:
             raise PreviousSyntaxError(
                 "Invalid use of PREVIOUS syntax for {}. You may not specify a name here.".format(
@@ -214,4 +287,5 @@ class PREVIOUS(get_metaclass(_PreviousMeta, 'PREVIOUSMeta')):
                                        "Index must be an integer."
                                       ).format(str(self)))
         self._index = index
+        self._str_cache = None
         return self
\ No newline at end of file
@@ -14,6 +14,7 @@ Functions
 Work
 ----
  * :func:`prepare_work` - Prepares a :class:`WorkUnit` for execution
+ * :func:`prepare_work_batch` - Prepares a list of :class:`WorkUnit` for execution in one pass
  * :func:`run_work` - Executes a :class:`WorkUnit`
  * :func:`run_work_sequence` - Executes a :class:`WorkSequence`
  * :func:`run_work_parallel` - Executes a :class:`WorkParallel`
@@ -35,6 +36,7 @@ PREVIOUS syntax
 
 """
 import functools
+import time
 from tigres.core.monitoring.common import Level, Keyword
 from tigres.core.task import Task, TaskArray, validate_tigres_object, \
     InputArray, InputValues
@@ -45,28 +47,35 @@ try:
 except NameError:
     pass
 
-from copy import copy
-
 try:
     from itertools import zip_longest
 except ImportError:
-    from itertools import izip_longest
+    from itertools import izip_longest, izip
 
     zip_longest = izip_longest
+    zip = izip
 from tigres.core.state.program import Program
 import tigres
+from tigres.core.execution import get_plugin
 from tigres.core.previous import PREVIOUS
-from tigres.core.monitoring.log import log_template, log_node
+from tigres.core.monitoring.log import log_template, log_node, log_enabled
 from tigres.core.utils import TigresInternalException
 from tigres.core.state.work import WorkSequence, WorkInputs, WorkParallel
 from tigres.utils import State, TaskFailure, TigresException
 
+# Interval (seconds) between polls of work that the engine reports as
+# still running. It doubles after every poll, up to the maximum.
+POLL_INTERVAL_MIN = 0.1
+POLL_INTERVAL_MAX = 5.0
+
 
 class _LogWork(object):
     """
     Logging decorator that allows you to log  entry and exit points of run_work_*
     functions.  This decorator assumes that the first argument is a WorkBase object
     """
+    __slots__ = ()
+
     # Customize these messages
     ENTRY_MESSAGE = 'Begin Work {}'
     EXIT_MESSAGE = 'End Work {}'
@@ -83,16 +92,19 @@ class _LogWork(object):
 
         @functools.wraps(func)
         def wrapper(*args, **kwds):
+            if not log_enabled(Level.INFO):
+                return func(*args, **kwds)
             work = args[0]
-            log_args = { Keyword.WORK_UID: work.name}
+            name, nodetype = work.name, work.TYPE_NAME
+            log_args = { Keyword.WORK_UID: name}
             if work.parent is not None:
                 # FIXME - what is the best way to handle this name formatting?
-                log_args[Keyword.TMPL_UID] = work.parent.name.replace(" ", "+")
-            log_node(Level.INFO, work.name, state=work.state, nodetype=work.get_type_name(),
-                     message=_LogWork.ENTRY_MESSAGE.format(work.name), **log_args)
+                log_args[Keyword.TMPL_UID] = work.parent.log_name
+            log_node(Level.INFO, name, state=work.state, nodetype=nodetype,
+                     message=_LogWork.ENTRY_MESSAGE.format(name), **log_args)
             f_result = func(*args, **kwds)
-            log_node(Level.INFO, work.name, state=work.state, nodetype=work.get_type_name(),
-                     message=_LogWork.EXIT_MESSAGE.format(work.name), **log_args)
+            log_node(Level.INFO, name, state=work.state, nodetype=nodetype,
+                     message=_LogWork.EXIT_MESSAGE.format(name), **log_args)
             return f_result
         return wrapper
 
@@ -116,52 +128,84 @@ def prepare_work(work):
 
     :param work: the state the prepared for execution
     """
-    if work.state not in (State.NEW, State.RUN, State.READY):
-        raise TigresInternalException(
-            "Error trying to run state. Cannot run state! Invalid state {}".format(
-                work.state))
+    prepare_work_batch((work,))
 
-    # Was this state already started?
-    if work.state is State.NEW:
-        _validate_inputs(work)
 
-        # Evaluate the state inputs for PREVIOUS
-        copy_input_values = execute_previous_syntax(work)
+def prepare_work_batch(work_list):
+    """
+    Prepare the given state for execution in one pass, see :func:`prepare_work`.
+    The previous work and its results are looked up once for the whole batch
+    instead of once for every PREVIOUS input.
+
+    :param work_list: the state to be prepared for execution
+    :type work_list: list
+    """
+    previous_cache = {}
+    for work in work_list:
+        state = work.state
+        if state not in (State.NEW, State.RUN, State.READY):
+            raise TigresInternalException(
+                "Error trying to run state. Cannot run state! Invalid state {}".format(
+                    state))
+
+        # Was this state already started?
+        if state is not State.NEW:
+            continue
+        previous_positions = _validate_inputs(work)
+
+        # Evaluate the state inputs for PREVIOUS, the inputs are only
+        # replaced if there was something to resolve
+        copy_input_values = None
+        if previous_positions:
+            copy_input_values = execute_previous_syntax(work,
+                                                        previous_positions,
+                                                        previous_cache)
         work.state = State.READY
-        if copy_input_values:
+        if copy_input_values is not None:
             work.inputs = WorkInputs(work.inputs.task, copy_input_values)
 
 
-def run_work(work):
+def run_work(work, engine=None):
     """
     Executes a :class:`WorkUnit`
 
+    :param work: the work to execute
+    :type work: tigres.core.state.WorkUnit
+    :param engine: the execution plugin to use (Default: the program's execution plugin)
+    :type engine: tigres.core.execution.plugin.ExecutionPluginBase
     :rtype : list, object or TaskFailure
     :return: task's output
     :raises: Exception if there are errors resolving inputs
     """
 
     prepare_work(work)
+    if engine is None:
+        engine = tigres.core.execution.engine
 
     try:
 
         work.state = State.RUN
-        work.results, work.state = tigres.core.execution.engine.execute(
-            work.name, work.inputs.task,
-            work.inputs.values,
-            work.execution_data)
+        # The arguments are the same for every call to the engine
+        name, inputs, execution_data = work.name, work.inputs, work.execution_data
+        task, input_values = inputs
 
         # If this is a sequence we are running sequence state wait until state is finished.
-        while isinstance(work.parent, WorkSequence) and work.state in (
-                State.READY, State.RUN):
-            work.results, work.state = tigres.core.execution.engine.execute(
-                work.name, work.inputs.task,
-                work.inputs.values, work.execution_data)
+        # Sleep between polls (e.g. a batch job that is still queued) so the
+        # engine is not polled in a busy loop.
+        wait = isinstance(work.parent, WorkSequence)
+        poll_interval = POLL_INTERVAL_MIN
+        while True:
+            work.results, work.state = engine.execute(
+                name, task, input_values, execution_data)
+            if not wait or work.state not in (State.READY, State.RUN):
+                break
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, POLL_INTERVAL_MAX)
 
     except Exception as err:
         work.results, work.state = TaskFailure(
             name="{} task failed".format(work.name), error=err), State.FAIL
-        raise err
+        raise
 
 @_LogWork()
 def run_work_sequence(sequence_work, task_array, input_array, env=None):
@@ -183,18 +227,24 @@ def run_work_sequence(sequence_work, task_array, input_array, env=None):
     if not env:
         env = {}
 
-    work_generator = _WorkGenerator(task_array, input_array, fill=False,
-                                    env=env)
+    work_generator = _work_generator(task_array, input_array, fill=False,
+                                     env=env)
     for work in work_generator:
         sequence_work.append(work)
         run_work(work)
 
-        # Check for a Failure
-        if isinstance(work.results, TaskFailure):
-            raise work.results.error
+        # Failures raised by the engine have already propagated, this only
+        # catches an engine that reports the failure in its return value
+        if work.state is State.FAIL:
+            if isinstance(work.results, TaskFailure):
+                raise work.results.error
+            raise TigresException(
+                "Task {} failed in sequence {}".format(work.name,
+                                                       sequence_work.name))
 
 @_LogWork()
-def run_work_parallel(parallel_work, task_array, input_array, env=None):
+def run_work_parallel(parallel_work, task_array, input_array, env=None,
+                      execution=None):
     """
     Executes a :class:`WorkParallel`
 
@@ -204,6 +254,9 @@ def run_work_parallel(parallel_work, task_array, input_array, env=None):
     :param input_array: The array of inputs for the tasks
     :type input_array: InputArray
     :param env: keyword arguments for the template task execution environment
+    :param execution: The execution plugin for the parallel tasks (e.g. :class:`Execution.LOCAL_PROCESS`).
+                      Default: the program's execution plugin
+    :type execution: str
     :return: results of all tasks
     :rtype: list
     """
@@ -213,18 +266,50 @@ def run_work_parallel(parallel_work, task_array, input_array, env=None):
     if not env:
         env = {}
 
-    work_generator = _WorkGenerator(task_array, input_array, env=env)
-    parallel_fn = tigres.core.execution.engine.parallel
-    for work in work_generator:
-        _validate_inputs(work)
-        parallel_work.append(work)
-        prepare_work(work)
-
-    parallel_fn(parallel_work, run_work)
+    work_generator = _work_generator(task_array, input_array, env=env)
+    if execution:
+        engine = get_plugin(execution)
+        run_fn = functools.partial(run_work, engine=engine)
+    else:
+        engine = tigres.core.execution.engine
+        run_fn = run_work
+    parallel_fn = engine.parallel
+    work_list = list(work_generator)
+    parallel_work.extend(work_list)
+    # Validates the inputs and resolves PREVIOUS
+    prepare_work_batch(work_list)
+
+    parallel_fn(parallel_work, run_fn)
     if parallel_work.state == State.FAIL:
         raise TigresException("One or more parallel tasks failed.")
 
 
+def _fill_previous_inputs(name, template_kind, input_array):
+    """
+    Fill an empty input array with one ``[PREVIOUS.i]`` input for each of
+    the previous results.
+
+    :param name: the template name
+    :param template_kind: the template type for error messages
+    :param input_array: the empty input array to fill
+    :type input_array: InputArray
+    :raises: ValueError if there are no previous results to use
+    """
+    previous_results = get_results()
+    if not previous_results:
+        raise ValueError(
+            "{0:s} template '{1:s}' is missing PREVIOUS parallel task input array".format(
+                template_kind.capitalize(), name))
+    try:
+        num_results = len(previous_results)
+    except Exception as e:
+        raise ValueError(
+            '{0:s} template \'{1:s}\' failed trying  to use PREVIOUS result:'
+            '{2}'.format(template_kind.capitalize(), name, str(e)))
+    # The inputs are only read, so they can share one PREVIOUS.i list
+    input_array.extend([[PREVIOUS.i]] * num_results)
+
+
 def run_template_sequence(name, task_array, input_array, env=None):
     """
     Runs  a :class:`WorkSequence` which is an ordered list of :class:`WorkUnit`
@@ -239,7 +324,6 @@ def run_template_sequence(name, task_array, input_array, env=None):
     validate_tigres_object('task_array', TaskArray, task_array)
     validate_tigres_object('input_array', InputArray, input_array)
 
-    from tigres.core.state.program import Program
     # Get the Tigres Program
     program = Program()
 
@@ -256,18 +340,20 @@ def run_template_sequence(name, task_array, input_array, env=None):
     return sequence_work.results
 
 
-def run_template_parallel(name, task_array, input_array, env=None):
+def run_template_parallel(name, task_array, input_array, env=None,
+                          execution=None):
     """
     Runs a :class:`WorkParallel` which is an ordered list of :class:`WorkUnit`
     :param name:
     :param task_array:
     :param input_array:
+    :param env: keyword arguments for the template task execution environment
+    :param execution: execution plugin for the parallel tasks
     :return:
     """
     validate_tigres_object('task_array', TaskArray, task_array)
     validate_tigres_object('input_array', InputArray, input_array)
 
-    from tigres.core.state.program import Program
     # Get the Tigres Program
     program = Program()
 
@@ -276,18 +362,7 @@ def run_template_parallel(name, task_array, input_array, env=None):
         input_array = []
     if len(input_array) == 0:
         # Evaluate implicit PREVIOUS for the parallel template input
-        previous_results = get_results()
-        if not previous_results:
-            raise ValueError(
-                "Parallel template '{0:s}' is missing PREVIOUS parallel task input array".format(
-                    name))
-        try:
-            for _ in previous_results:
-                input_array.append([PREVIOUS.i])
-        except Exception as e:
-            raise ValueError(
-                'Parallel template \'{0:s}\' failed trying  to use PREVIOUS result:'
-                '{}'.format(name, str(e)))
+        _fill_previous_inputs(name, 'parallel', input_array)
 
     # Register the parallel state with the Tigres program
     parallel_work = program.register_parallel_work(name)
@@ -295,7 +370,8 @@ def run_template_parallel(name, task_array, input_array, env=None):
 
     # Run the Parallel Work
     log_template(parallel_work.name, State.RUN, 'parallel')
-    run_work_parallel(parallel_work, task_array, input_array, env=env)
+    run_work_parallel(parallel_work, task_array, input_array, env=env,
+                      execution=execution)
     log_template(parallel_work.name, parallel_work.state, 'parallel')
 
     # Done let's return the results
@@ -303,7 +379,7 @@ def run_template_parallel(name, task_array, input_array, env=None):
 
 
 def run_template_split(name, split_task, split_input_values, task_array,
-                       input_array, env=None):
+                       input_array, env=None, execution=None):
     """
     Runs split template which consistes of a SequenceWork with Work then a ParallelWork
 
@@ -312,6 +388,8 @@ def run_template_split(name, split_task, split_input_values, task_array,
     :param split_input_values:
     :param task_array:
     :param input_array:
+    :param env: keyword arguments for the template task execution environment
+    :param execution: execution plugin for the parallel tasks
     :return: the results
     """
     validate_tigres_object('task_array', TaskArray, task_array)
@@ -328,8 +406,6 @@ def run_template_split(name, split_task, split_input_values, task_array,
                                                     split_input_values)
 
     # Get the Tigres Program
-    from tigres.core.state.program import Program
-
     program = Program()
 
     # Register the split sequence template with the Tigres Program
@@ -339,9 +415,7 @@ def run_template_split(name, split_task, split_input_values, task_array,
     # Register the split state with the Tigres Program
     log_template(split_sequence_work.name, State.RUN, 'split')
     split_work = program.register_work(
-        WorkInputs(split_task, split_input_values))
-    split_work.execution_data.setdefault('env', {})
-    split_work.execution_data['env'].update(env)
+        WorkInputs(split_task, split_input_values), env=program.template_env(env))
     split_sequence_work.append(split_work)
 
     # run the split state
@@ -350,26 +424,16 @@ def run_template_split(name, split_task, split_input_values, task_array,
     # Run the split parallel state
     # if the input list is empty this means process the previous results
     if len(input_array) == 0:
-        # Evaluate implicit PREVIOUS for the merge template input
-        previous_results = get_results()
-        if not previous_results:
-            raise ValueError(
-                "Split template '{0:s}' is missing parallel task input array".format(
-                    name))
-        try:
-            for _ in previous_results:
-                input_array.append([PREVIOUS.i])
-        except Exception as e:
-            raise ValueError(
-                'Split template \'{0:s}\' failed trying  to use PREVIOUS split task result:'
-                '{}'.format(name, str(e)))
+        # Evaluate implicit PREVIOUS for the split template input
+        _fill_previous_inputs(name, 'split', input_array)
 
     # Register the split parallel state with the Tigres Program
     split_parallel_work = program.register_parallel_work(name)
     split_sequence_work.append(split_parallel_work)
 
     input_array = _validate_split_parallel_task(name, task_array, input_array)
-    run_work_parallel(split_parallel_work, task_array, input_array, env=env)
+    run_work_parallel(split_parallel_work, task_array, input_array, env=env,
+                      execution=execution)
     log_template(split_sequence_work.name, split_sequence_work.state, 'split')
 
     # Done, let's return the results
@@ -377,7 +441,7 @@ def run_template_split(name, split_task, split_input_values, task_array,
 
 
 def run_template_merge(name, task_array, input_array, merge_task,
-                       merge_input_values, env=None):
+                       merge_input_values, env=None, execution=None):
     """
     Runs a merge template composed of a SequenceWork with a ParallelWork then a Work
 
@@ -386,6 +450,8 @@ def run_template_merge(name, task_array, input_array, merge_task,
     :param input_array:
     :param merge_task:
     :param merge_input_values:
+    :param env: keyword arguments for the template task execution environment
+    :param execution: execution plugin for the parallel tasks
     :return:
     """
     validate_tigres_object('task_array', TaskArray, task_array)
@@ -404,8 +470,6 @@ def run_template_merge(name, task_array, input_array, merge_task,
                 name))
 
     # Get the Tigres Program
-    from tigres.core.state.program import Program
-
     program = Program()
 
     # Check that the parallel tasks have values
@@ -413,18 +477,7 @@ def run_template_merge(name, task_array, input_array, merge_task,
         input_array = []
     if len(input_array) == 0:
         # Evaluate implicit PREVIOUS for the merge template input
-        previous_results = get_results()
-        if not previous_results:
-            raise ValueError(
-                "Merge template '{0:s}' is missing PREVIOUS parallel task input array".format(
-                    name))
-        try:
-            for _ in previous_results:
-                input_array.append([PREVIOUS.i])
-        except Exception as e:
-            raise ValueError(
-                'Merge template \'{0:s}\' failed trying  to use PREVIOUS result:'
-                '{}'.format(name, str(e)))
+        _fill_previous_inputs(name, 'merge', input_array)
 
     # Register a sequence for the merge template with the Tigres Program
     merge_sequence_work = program.register_sequence_work(name)
@@ -436,7 +489,8 @@ def run_template_merge(name, task_array, input_array, merge_task,
     merge_sequence_work.append(merge_parallel_work)
 
     # run parallel state
-    run_work_parallel(merge_parallel_work, task_array, input_array, env=env)
+    run_work_parallel(merge_parallel_work, task_array, input_array, env=env,
+                      execution=execution)
 
     # Register the merge state with the Tigres Program
     # Evaluate the implicit PREVIOUS syntax
@@ -444,9 +498,7 @@ def run_template_merge(name, task_array, input_array, merge_task,
                                                     merge_input_values)
 
     merge_work = program.register_work(
-        WorkInputs(merge_task, merge_input_values))
-    merge_work.execution_data.setdefault('env', {})
-    merge_work.execution_data['env'].update(env)
+        WorkInputs(merge_task, merge_input_values), env=program.template_env(env))
     merge_sequence_work.append(merge_work)
 
     # Run Merge Work
@@ -488,124 +540,123 @@ def evaluate_implicit_previous(task, input_values, previous_syntax=PREVIOUS):
             return_input_values = new_input_values
         else:
             # copy the original input values
-            return_input_values = copy(input_values)
+            return_input_values = list(input_values)
 
     return return_input_values
 
 
-def execute_previous_syntax(work):
+def _previous_positions(input_values):
+    """
+    Find the input values that use the PREVIOUS syntax.
+
+    :param input_values: the input values to scan
+    :return: the positions of the PREVIOUS values
+    :rtype: list
+    """
+    return [i for i, v in enumerate(input_values)
+            if v is PREVIOUS or type(v) is PREVIOUS]
+
+
+def execute_previous_syntax(work, previous_positions=None, previous_cache=None):
     """
     Evaluates any input values that use the PREVIOUS syntax.
-    Returns a new input array with the resolved PREVIOUS values.
+    Returns a new input array with the resolved PREVIOUS values, or
+    ``None`` if there was no PREVIOUS syntax to resolve.
 
     :param work:
     :type work: WorkUnit
+    :param previous_positions: positions of the PREVIOUS values if already
+        known (e.g. from :func:`_validate_inputs`), otherwise the inputs are scanned
+    :type previous_positions: list
+    :param previous_cache: shared by a batch of work to look up the previous
+        results once
+    :type previous_cache: dict or None
 
     :return: input_values
     :rtype: list
     """
 
-    # Shallow copy of input values
-    copy_input_values = copy(work.inputs.values)
-    for i in range(len(copy_input_values)):
+    input_values = work.inputs.values
+    if previous_positions is None:
+        previous_positions = _previous_positions(input_values)
+    if not previous_positions:
+        return None
+
+    # Shallow copy of input values, a list even if they are a tuple
+    copy_input_values = list(input_values)
+    index = work.index
+    for i in previous_positions:
+        value = input_values[i]
         # resolve the PREVIOUS values
-        if copy_input_values[i] is PREVIOUS:
+        if value is PREVIOUS:
             # Instantiate PREVIOUS for usage
-            copy_input_values[i] = copy_input_values[i]()
-        if isinstance(copy_input_values[i], PREVIOUS):
-            # Execute PREVIOUS
-            copy_input_values[i] = copy_input_values[i](work.index)
+            value = value()
+        # Execute PREVIOUS, storing the result with a single assignment
+        copy_input_values[i] = value(index, previous_cache)
     return copy_input_values
 
 
-class _WorkGenerator:
+def _work_generator(task_array, input_array, fill=True, env=None):
     """
-    Generates a list of newly registered Work objects for the specified task array and input array.
-
+    Generates newly registered Work objects for the specified task array and input array.
+    A comparison of the task and input arrays occurs before the first Work is generated.
+    If ``fill`` is ``True``, then tasks or inputs are implied if the arrays are of unequal length.
+
+    Each Work is registered with the Tigres Program as it is generated.
+
+    :param fill: Should the inputs or tasks be copied if task and input arrays are unequal?
+    :type fill: bool
+    :param task_array: The tasks used to generate each piece of Work
+    :type task_array: list
+    :param input_array: The inputs used to generate each piece of Work
+    :type input_array: list
+    :param env: keyword arguments for the task execution environment
+    :return: a state generator
+    :rtype: generator of WorkUnit
+    :raises ValueError
     """
+    if not task_array or len(task_array) == 0:
+        raise ValueError("The tasks are missing")
+    if input_array is None:
+        raise ValueError("The inputs are missing")
+
+    len_task_array = len(task_array)
+    len_input_array = len(input_array)
+
+    # This will default to  PREVIOUS
+    fillvalue = [PREVIOUS]
+    if len_input_array != len_task_array:
+        if fill:
+            if len_task_array > len_input_array:
+                if len_input_array == 1:
+                    fillvalue = input_array[-1]
+                elif len_input_array > 1:
+                    raise ValueError(
+                        "Task and input lists are unequal length. There is no implicit interpretation" +
+                        " of inputs for {0:d} tasks and {1:d} inputs. ".format(
+                            len_task_array, len_input_array))
+            elif len_task_array < len_input_array:
+                if len_task_array == 1:
+                    fillvalue = task_array[-1]
+                elif len_task_array > 1:
+                    raise ValueError(
+                        "Task and input lists are unequal length. There is no implicit interpretation" +
+                        " of inputs for {0:d} tasks and {1:d} inputs. ".format(
+                            len_task_array, len_input_array))
 
 
-    def __init__(self, task_array, input_array, fill=True, env=None):
-        """
-        Generates a list of newly registered Work objects for the specified task array and input array.
-        During initialization a comparison of the task and input arrays occurs. If ``fill`` is ``True``,
-        then tasks or inputs are implied if the arrays are of unequal length.
-
-        :param fill: Should the inputs or tasks be copied if task and input arrays are unequal?
-        :type fill: bool
-        :param task_array: The tasks used to generate each piece of Work
-        :type task_array: list
-        :param input_array: The inputs used to generate each piece of Work
-        :type input_array: list
-        :param env: keyword arguments for the task execution environment
-        :return: a state generator
-        :rtype: _WorkGenerator
-        :raises WorkGenerationException
-        """
-        self._task_array = task_array
-        self._input_array = input_array
-        self._values = []
-        self._index = 0
-
-        if not self._task_array or len(self._task_array) == 0:
-            raise ValueError("The tasks are missing")
-        if self._input_array is None:
-            raise ValueError("The inputs are missing")
-
-        len_task_array = len(task_array)
-        len_input_array = len(input_array)
-
-        # This will default to  PREVIOUS
-        fillvalue = [PREVIOUS]
-        if len_input_array != len_task_array:
-            if fill:
-                if len_task_array > len_input_array:
-                    if len_input_array == 1:
-                        fillvalue = input_array[-1]
-                    elif len_input_array > 1:
-                        raise ValueError(
-                            "Task and input lists are unequal length. There is no implicit interpretation" +
-                            " of inputs for {0:d} tasks and {1:d} inputs. ".format(
-                                len_task_array, len_input_array))
-                elif len_task_array < len_input_array:
-                    if len_task_array == 1:
-                        fillvalue = task_array[-1]
-                    elif len_task_array > 1:
-                        raise ValueError(
-                            "Task and input lists are unequal length. There is no implicit interpretation" +
-                            " of inputs for {0:d} tasks and {1:d} inputs. ".format(
-                                len_task_array, len_input_array))
-
-
-        # Generate the WorkInputs to register as state with the Tigres Program
-        for idx, item in enumerate(
-                zip_longest(task_array, input_array, fillvalue=fillvalue)):
-            inputs = WorkInputs(item[0], item[1])
-            work = Program().register_work(inputs)
-            work.execution_data.setdefault('env', {})
-            work.execution_data['env'].update(env)
-            work.index = idx
-            self._values.append(work)
-
-    def __iter__(self):
-        return self
-
-    def next(self):
-        # Python 3 compatible
-        return self.__next__()
-
-    def __next__(self):
-        """
-
-            :return: the next piece of state
-            :rtype: WorkUnit
-            """
-        if self._index < len(self._values):
-            value = self._values[self._index]
-        else:
-            raise StopIteration
-        self._index += 1
-        return value
+    # Generate the WorkInputs to register as state with the Tigres Program
+    program = Program()
+    shared_env = program.template_env(env)
+    if len_task_array == len_input_array:
+        # Nothing to fill, which is the common case
+        items = zip(task_array, input_array)
+    else:
+        items = zip_longest(task_array, input_array, fillvalue=fillvalue)
+    for idx, (task, values) in enumerate(items):
+        work = program.register_work(WorkInputs(task, values), env=shared_env)
+        work.index = idx
+        yield work
 
 
 def _validate_inputs(work):
@@ -615,30 +666,32 @@ def _validate_inputs(work):
 
     :param work: The state unit to validate
     :type work: tigres.core.state.WorkUnit
-    :return: None
+    :return: positions of the input values that use the PREVIOUS syntax
+    :rtype: list
     :raises: ValueError
     """
 
+    previous_positions = []
+    task, input_values = work.inputs
     # Are there input values?
-    if work.inputs.values:
+    if input_values:
         # There are input values but are there any values?
-        if not isinstance(work.inputs.values, (list, tuple)):
+        if not isinstance(input_values, (list, tuple)):
             raise ValueError(
                 "Invalid input values for Task '{}'. Input values is a '{}' it must be a 'list' or 'tuple'".format(
-                    work.inputs.task.name, type(work.inputs.values).__name__))
+                    task.name, type(input_values).__name__))
             # Examine the values for valid use of the PREVIOUS syntax
-        for v in work.inputs.values:
-            if v is PREVIOUS or isinstance(v, PREVIOUS):
-                if Program().previous_work:
-                    # No value error was thrown by Program().previous
-                    # We can continue
-                    pass
-    elif not work.inputs.values and work.inputs.task.input_types and len(
-            work.inputs.task.input_types) > 0:
+        previous_positions = _previous_positions(input_values)
+        if previous_positions and Program().previous_work:
+            # No value error was thrown by Program().previous
+            # We can continue, one check covers all of the values
+            pass
+    elif task.input_types and len(task.input_types) > 0:
         # Input Values are missing, raise an error
         raise ValueError(
             "Task {0:s} with Work Id {1:s} is missing it's input values".format(
-                work.inputs.task.name, work.name))
+                task.name, work.name))
+    return previous_positions
 
 
 def _validate_split_parallel_task(name, task_array, input_array):
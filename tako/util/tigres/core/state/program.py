@@ -19,19 +19,33 @@ Classes
 
 
 """
+import logging
+import sys
 import time
+import traceback
 from uuid import uuid4
 import threading
 
-from tigres.core.execution import load_plugin
+try:
+    import queue
+except ImportError:
+    import Queue
+
+    queue = Queue
+
+from tigres.core.execution import load_plugin, shutdown_plugins
 from tigres.core.utils import SingletonMeta
 from tigres.core.state.work import WorkUnit, WorkParallel, WorkSequence, \
     Identifier, CURRENT_INDEX, PREVIOUS_INDEX
 from tigres.utils import get_new_output_file, State, Execution
-from tigres.core.monitoring.log import init, finalize, log_node
+from tigres.core.monitoring.log import init, finalize, log_node, log_enabled
 from tigres.core.monitoring.common import Keyword, Level, NodeType
 
 
+# Maximum number of queued registration log entries, more are dropped
+LOG_QUEUE_SIZE = 20000
+
+
 class ProgramExecutionError(Exception):
     pass
 
@@ -71,57 +85,98 @@ class Program(_ProgramSingletonMeta):
         :return: program
         :rtype: Program
 
+        Only the in memory state is set up here. Monitoring, the root state
+        and the execution plugin are set up by :meth:`bootstrap` when the
+        first state is registered.
         """
 
-        self._lock = threading.Lock()
+        # Separate locks for the state and for the tigres objects, so that
+        # registering one does not block the other
+        self._work_lock = threading.Lock()
+        self._objects_lock = threading.Lock()
         if name is None:
             # Autogenerate a name
             name = "Tigres{:x}".format(int(time.time()))
 
         # All Tasks are registered here
         self._tigres_objects = {}
+        # Identifiers of the registered tigres objects by name
+        self._tigres_object_names = {}
         self._env = env
+        # Environment shared by all work that has no template environment
+        self._shared_env = dict(env) if env else {}
 
         # All state is registered here
         self._work = {}
+        # Identifiers of the registered state by name
+        self._work_names = {}
 
         self._name = name
         self._identifier = str(uuid4())
 
-        # init monitoring
-        monitoring_kw = {k[4:]: v for k, v in kwargs.items() if
-                         k.startswith("log_") and k != "log_dest"}
-
+        # Saved for bootstrap
+        self._execution = execution
         self._log_dest = log_dest
-        if log_dest is None:
+        self._monitoring_kw = {k[4:]: v for k, v in kwargs.items() if
+                               k.startswith("log_") and k != "log_dest"}
+        self._bootstrap_lock = threading.Lock()
+        self._bootstrapped = False
+        self._log_queue = None
+
+    def bootstrap(self):
+        """
+        Set up monitoring, the root state and the execution plugin for the
+        program. This happens once, the first time state is registered or
+        when the program is started with :func:`tigres.start`.
+
+        :return: None
+        """
+        if self._bootstrapped:
+            return
+        with self._bootstrap_lock:
+            if self._bootstrapped:
+                return
+            self._bootstrap()
+            self._bootstrapped = True
+
+    def _bootstrap(self):
+        name = self._name
+        execution = self._execution
+
+        # init monitoring
+        if self._log_dest is None:
             self._log_dest = get_new_output_file(
                 basename='tigres-{}'.format(name))
-        init(self._log_dest, self.name, self._identifier, **monitoring_kw)
+        init(self._log_dest, self.name, self._identifier, **self._monitoring_kw)
+
+        # Registration messages are written by a background thread so that
+        # registering many tasks does not wait on the log. It is started
+        # once monitoring is initialized, so that it is not left running
+        # if that fails.
+        self._log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._log_thread = threading.Thread(target=self._log_writer,
+                                            name="TigresProgramLog")
+        self._log_thread.daemon = True
+        self._log_thread.start()
         self._log(Level.INFO, "start", state=State.RUN)
         self._log(Level.INFO, Keyword.pfx + "init_program",
                   message="initializing program")
 
         # This must happen after the logging is initialized
-        # We might want to revisit whether we need to log
-        # every time a name is registered with the program
-        self._root_sequence_work = self.register_sequence_work(name)
+        self._root_sequence_work = self._create_work(name, WorkSequence)
 
         load_plugin(execution)
         self._log(Level.INFO, Keyword.pfx + "load_execution", message=execution)
 
     @staticmethod
-    def _get_keys_by_name(name, dictionary):
-        like_names = [key for key in list(dictionary.keys()) if
-                      key.name == name]
-        return like_names
-
-    def _get_unique_identifier(self, name, dictionary):
-        # Are there any names already registered?
-        like_names = self._get_keys_by_name(name, dictionary)
-        len_names = len(like_names)
-        # This name exists, create a new WorkId
-        identifier = Identifier(name, len_names)
-        return identifier
+    def _get_unique_identifier(name, name_index):
+        # Are there any names already registered? The index is
+        # the number of identifiers with the same name
+        return Identifier(name, len(name_index.get(name, ())))
+
+    @staticmethod
+    def _add_identifier(identifier, name_index):
+        name_index.setdefault(identifier.name, []).append(identifier)
 
     def _log(self, level, event, nodetype=NodeType.PROGRAM, **kwargs):
         """
@@ -134,6 +189,49 @@ class Program(_ProgramSingletonMeta):
         log_node(level, self._name, event=event, nodetype=nodetype,
                  **kwargs)
 
+    def _log_async(self, level, event, nodetype=NodeType.PROGRAM, **kwargs):
+        """
+        Queue messages for the program to be logged by the log writer thread.
+        The message is dropped if the queue is full, so that the program
+        never waits on the log. Nothing is logged before the program is
+        bootstrapped.
+        """
+        if self._log_queue is not None:
+            try:
+                self._log_queue.put_nowait((level, event, nodetype, kwargs))
+            except queue.Full:
+                pass
+
+    def _log_writer(self):
+        """
+        Log the queued program messages until the stop sentinel is queued
+        """
+        log_queue = self._log_queue
+        while True:
+            entry = log_queue.get()
+            if entry is None:
+                break
+            level, event, nodetype, kwargs = entry
+            try:
+                self._log(level, event, nodetype=nodetype, **kwargs)
+            except Exception:
+                # Reported as logging.Handler.handleError does, the
+                # thread carries on with the next message
+                if logging.raiseExceptions and sys.stderr:
+                    try:
+                        sys.stderr.write('--- Logging error ---\n')
+                        traceback.print_exc(file=sys.stderr)
+                    except Exception:
+                        pass
+
+    def _stop_log_writer(self):
+        """
+        Write any queued program messages and stop the log writer thread
+        """
+        if self._log_thread.is_alive():
+            self._log_queue.put(None)
+            self._log_thread.join()
+
     def _register_work(self, name, work_class):
         """
         base register state method
@@ -152,21 +250,32 @@ class Program(_ProgramSingletonMeta):
         if not work_class:
             raise ProgramExecutionError(
                 "Work Registration error: A Work class must be specified for %s" % name)
+        self.bootstrap()
+        return self._create_work(name, work_class)
+
+    def _create_work(self, name, work_class):
+        """
+        Create the state and add it to the registered state
+        """
         parent = None
 
-        with self._lock:
+        with self._work_lock:
             if hasattr(self, '_root_sequence_work') and len(self._root_sequence_work) > 0:
                 if work_class is WorkUnit:
                     parent = self._root_sequence_work[CURRENT_INDEX]
             elif hasattr(self, '_root_sequence_work'):
                 parent = self._root_sequence_work
 
-            work_id = self._get_unique_identifier(name, self._work)
+            work_id = self._get_unique_identifier(name, self._work_names)
             work = work_class(parent, work_id)
             self._work[work_id] = work
-            self._log(Level.INFO, "register",
-                      message="registering {} '{}' ".format(type(work).__name__, work.name))
-            return work
+            self._add_identifier(work_id, self._work_names)
+        # Registering every name is debugging information, the message is
+        # only built when it will be logged
+        if log_enabled(Level.DEBUG):
+            self._log_async(Level.DEBUG, "register",
+                            message="registering {} '{}' ".format(type(work).__name__, work.name))
+        return work
 
     @staticmethod
     def clear():
@@ -175,8 +284,12 @@ class Program(_ProgramSingletonMeta):
         :return: None
         """
         if hasattr(Program, '_instance') and Program._instance:
-            Program()._log(Level.INFO, "end", state=State.DONE)
-            finalize()
+            program = Program()
+            if program._bootstrapped:
+                program._stop_log_writer()
+                program._log(Level.INFO, "end", state=State.DONE)
+                shutdown_plugins()
+                finalize()
             Program._instance = None
 
     @property
@@ -189,32 +302,40 @@ class Program(_ProgramSingletonMeta):
 
     @property
     def name(self):
-        with self._lock:
-            if hasattr(self, '_root_sequence_work'):
-                return self._root_sequence_work.name
-            else:
-                return self._name
+        # No lock, the root state is only set once
+        root_sequence_work = getattr(self, '_root_sequence_work', None)
+        if root_sequence_work is not None:
+            return root_sequence_work.name
+        return self._name
 
     @property
     def previous_work(self):
         """
         Return the :class:`WorkBase` from the previous execution.
         """
-        with self._lock:
-            current_work = self._root_sequence_work[CURRENT_INDEX]
-            is_sequence = isinstance(current_work, WorkSequence)
-            if len(current_work) > 1 and is_sequence:
-                # The current state is a sequence, and there is previous task
-                # available
-                return self._root_sequence_work[CURRENT_INDEX][PREVIOUS_INDEX]
-            elif len(self._root_sequence_work) > 1:
-                # The current state is either parallel or it is the first
-                # task in a sequence.  Therefore, the results of the
-                # previous template is returned
-                return self._root_sequence_work[PREVIOUS_INDEX]
+        self.bootstrap()
+        root_sequence_work = self._root_sequence_work
+        # Only the snapshot of the root state needs the lock, the
+        # checks below work on the snapshot
+        with self._work_lock:
+            current_work = root_sequence_work[CURRENT_INDEX]
+            if len(root_sequence_work) > 1:
+                previous_template = root_sequence_work[PREVIOUS_INDEX]
             else:
-                # There are not previous tasks to retrieve.
-                raise ValueError("There is no previous state available.")
+                previous_template = None
+
+        if isinstance(current_work, WorkSequence) and len(current_work) > 1:
+            # The current state is a sequence, and there is previous task
+            # available
+            return current_work[PREVIOUS_INDEX]
+        elif previous_template is not None:
+            # The current state is either parallel or it is the first
+            # task in a sequence.  Therefore, the results of the
+            # previous template is returned
+            return previous_template
+        else:
+            # There are not previous tasks to retrieve.
+            raise ValueError("There is no previous state available.")
 
     def get_work_by_name(self, name):
         """
@@ -225,8 +346,8 @@ class Program(_ProgramSingletonMeta):
         :return: Work objects with the name
         :rtype: list
         """
-        with self._lock:
-            return self._get_keys_by_name(name, self._work)
+        with self._work_lock:
+            return list(self._work_names.get(name, ()))
 
     @property
     def root_work(self):
@@ -235,8 +356,9 @@ class Program(_ProgramSingletonMeta):
         :return: the root state object
         :rtype: tigres.core.state.WorkSequence
         """
-        with self._lock:
-            return self._root_sequence_work
+        # No lock, the root state is set once when the program is bootstrapped
+        self.bootstrap()
+        return self._root_sequence_work
 
     def register(self, item):
         """
@@ -244,25 +366,47 @@ class Program(_ProgramSingletonMeta):
         :param item: The item to register
         :return: the new identifier
         """
-        with self._lock:
-            identifier = None
-            if hasattr(item, "_identifier"):
-                identifier = self._get_unique_identifier(item.name,
-                                                         self._tigres_objects)
-                self._tigres_objects[identifier] = item
-                name = identifier.name
-                if identifier.index > 0:
-                    name += "-{}".format(identifier.index)
-                self._log(Level.INFO, "register",
-                          message="registering identifier '{}' for {} with name '{}' ".format(
-                              name, type(item).__name__,
-                              item.name))
-            return identifier
-
-    def register_work(self, work_inputs):
+        if not hasattr(item, "_identifier"):
+            return None
+        with self._objects_lock:
+            identifier = self._get_unique_identifier(item.name,
+                                                     self._tigres_object_names)
+            self._tigres_objects[identifier] = item
+            self._add_identifier(identifier, self._tigres_object_names)
+        if log_enabled(Level.DEBUG):
+            name = identifier.name
+            if identifier.index > 0:
+                name += "-{}".format(identifier.index)
+            self._log_async(Level.DEBUG, "register",
+                            message="registering identifier '{}' for {} with name '{}' ".format(
+                                name, type(item).__name__,
+                                item.name))
+        return identifier
+
+    def template_env(self, env=None):
+        """
+        Merge the given template environment over the program environment.
+        The returned dictionary is shared by every piece of work in the
+        template and must not be modified.
+
+        :param env: keyword arguments for the template task execution environment
+        :type env: dict or None
+        :return: the execution environment for the template's work
+        :rtype: dict
+        """
+        if not env:
+            return self._shared_env
+        merged_env = dict(self._shared_env)
+        merged_env.update(env)
+        return merged_env
+
+    def register_work(self, work_inputs, env=None):
         """
         Register the given WorkInputs as new state.
         :param work_inputs: a new Work object with a unique WorkId
+        :param env: shared execution environment from :meth:`template_env`
+            (Default: the program environment)
+        :type env: dict or None
         :return: a new state object
         :rtype: tigres.core.state.WorkUnit
 
@@ -272,9 +416,7 @@ class Program(_ProgramSingletonMeta):
                 "Work inputs for %s are missing" % work_inputs.task.name)
         work = self._register_work(work_inputs.task.unique_name, WorkUnit)
         work.inputs = work_inputs
-        work.execution_data.setdefault('env', {})
-        if self._env:
-            work.execution_data['env'].update(self._env)
+        work.execution_data['env'] = self._shared_env if env is None else env
         return work
 
     def register_parallel_work(self, name):
@@ -34,9 +34,10 @@ Constants
 """
 from collections import namedtuple
 import functools
+import threading
 
 from tigres.core.monitoring.common import Keyword, Level
-from tigres.core.monitoring.log import log_task, log_node
+from tigres.core.monitoring.log import log_task, log_node, log_enabled
 from tigres.core.utils import TigresInternalException
 from tigres.utils import State, TaskFailure
 
@@ -51,6 +52,13 @@ WorkInputs = namedtuple("WorkInputs", "task values")
 ### Unique  identifier
 Identifier = namedtuple("Identifier", "name index")
 
+# Keywords used when a task changes state, looked up once
+_KW_STATE = Keyword.STATE
+_KW_STATUS = Keyword.STATUS
+_KW_ERROR = Keyword.ERROR
+_KW_TASK_UID = Keyword.TASK_UID
+_KW_TMPL_UID = Keyword.TMPL_UID
+
 
 def log_change_handler_state(inst, log_args, value):
     """
@@ -64,66 +72,93 @@ def log_change_handler_state(inst, log_args, value):
     assert isinstance(inst, WorkUnit)
     assert isinstance(log_args,dict)
 
-    log_args[Keyword.STATE] = value
+    parent = inst.parent
+    if parent is not None:
+        parent._child_state_changed(inst, value)
+    log_args[_KW_STATE] = value
     if value == State.FAIL:
-        log_args[Keyword.STATUS] = -1
+        log_args[_KW_STATUS] = -1
         if isinstance(inst.results, TaskFailure):
-            log_args[Keyword.ERROR] = str(inst.results.error).replace(
+            log_args[_KW_ERROR] = str(inst.results.error).replace(
                 "\n", "; ")
         return Level.ERROR
     return Level.INFO
 
 
-class _LogChangeProperty(object):
-    """
-    Computes attribute value and caches it in the instance.
-    Source: Python Cookbook
-    Author: Denis Otkidach http://stackoverflow.com/users/168352/denis-otkidach
-    This decorator allows you to create a property which can be computed once and
-    accessed many times. Sort of like memoization
+def _previous_work(work):
     """
-    def __init__(self, name, default=None, handler=None):
-        self.name = name
-        self.default = default
-        self.handler = handler
-
-    def __get__(self, inst, owner):
-
-        inst.__dict__.setdefault(self.name, self.default)
-        return inst.__dict__[self.name]
-
-    def __set__(self, inst, value):
-        inst.__dict__.setdefault(self.name, self.default)
-        if value != inst.__dict__[self.name]:
-            inst.__dict__[self.name] = value
-            log_args = {Keyword.TASK_UID: inst.name}
-            log_level = Level.INFO
-            # TODO - research better way to figure out who the parent is
-            # At this point we determine the name of the template which is
-            # one level below the root_work.  This will be revisited with
-            # nested templates
-            if inst.parent:
-                if inst.parent.parent and inst.parent.parent.parent and inst.parent.parent.parent.parent:
-                    log_args[Keyword.TMPL_UID] = inst.parent.parent.parent.name.replace(" ", "+")
-                elif inst.parent.parent and inst.parent.parent.parent:
-                    log_args[Keyword.TMPL_UID] = inst.parent.parent.name.replace(" ", "+")
-                else:
-                    log_args[Keyword.TMPL_UID] = inst.parent.name.replace(" ", "+")
-            if self.handler:
-                log_level = self.handler(inst, log_args, value)
-            else:
-                log_args[Keyword.EVENT] = self.name
-            log_node(log_level, inst.name, nodetype=inst.get_type_name(), **log_args)
+    Find the state that was run before the given state. The position the
+    state was added at is checked first, otherwise the siblings are
+    searched for it.
 
+    :param work: the state to find the previous for
+    :type work: WorkBase
+    :return: state previous to the given one or None
+    """
+    parent = work.parent
+    if parent:
+        index = work._position
+        if index is not None and index < len(parent) and parent[index] is work:
+            if index > 0:
+                return parent[index - 1]
+            return parent.previous
+        for index, sibling in enumerate(parent):
+            if sibling is work:
+                if index > 0:
+                    return parent[index - 1]
+                break
+        return parent.previous
+    return None
+
+
+def _add_work(parent, work_list):
+    """
+    Add the given state to the end of a :class:`WorkParallel` or
+    :class:`WorkSequence`. The parent of each state is set and the
+    list is extended once.
+
+    :param parent: the parallel or sequence state to add to
+    :param work_list: the state to add
+    :type work_list: list or tuple
+    :raises: TigresInternalException if an item is not a WorkBase
+    """
+    position = len(parent)
+    for p_object in work_list:
+        if not isinstance(p_object, WorkBase):
+            raise TigresInternalException(
+                "Must add WorkBase to {} not {}".format(parent.__class__.__name__,
+                                                        type(p_object)))
+        # Add parent as parent of this state, and where it is in the parent
+        p_object._parent = parent
+        p_object._position = position
+        position += 1
+    parent._children.extend(work_list)
+    parent._work_added(work_list)
+
+    for p_object in work_list:
+        if isinstance(p_object, WorkUnit) and p_object.state is State.UNKNOWN:
+            # Only set to NEW if UNKNOWN (this is a new object)
+            # Might want to reconsider this logic
+            p_object.state = State.NEW
 
 
 class WorkBase(object):
     """
     Base object for all state.
     """
+    __slots__ = ('_id', '_name', '_log_name', '_parent', '_position')
 
-    def get_type_name(self):
-        return NotImplemented
+    # The node type used in the logs, constant for each class
+    TYPE_NAME = NotImplemented
+
+    @classmethod
+    def get_type_name(cls):
+        """
+        The node type used in the logs. Kept for callers outside the
+        package, code that runs for every state change reads
+        :attr:`TYPE_NAME` instead.
+        """
+        return cls.TYPE_NAME
 
     def __init__(self, work_id, parent_work=None):
         """
@@ -146,6 +181,17 @@ class WorkBase(object):
         else:
             self._id = work_id
         self._parent = parent_work
+        # Index in the parent, set when the state is added to it
+        self._position = None
+
+        # The identifier does not change so the names are built once
+        name, index = self._id
+        if index == 0:
+            self._name = name
+        else:
+            # FIXME - '#' need to be disallowed in names
+            self._name = "{}#{}".format(name, index)
+        self._log_name = self._name.replace(" ", "+")
 
     @property
     def name(self):
@@ -154,11 +200,16 @@ class WorkBase(object):
         :return: name
         :rtype: str
         """
-        if self._id.index == 0:
-            return self._id.name
-        else:
-            # FIXME - '#' need to be disallowed in names
-            return "{}#{}".format(self._id.name, self._id.index)
+        return self._name
+
+    @property
+    def log_name(self):
+        """
+        The unique name of the state as it is written to the logs
+        :return: name with spaces replaced by '+'
+        :rtype: str
+        """
+        return self._log_name
 
     @property
     def parent(self):
@@ -176,14 +227,95 @@ class WorkBase(object):
     def results(self):
         raise NotImplementedError
 
+    def _work_added(self, work_list):
+        """
+        Called once the given state has been added to this state
+        """
+        pass
+
+    def _child_state_changed(self, work, state):
+        """
+        Called when the state of a :class:`WorkUnit` with this state as
+        its parent changes
+        """
+        pass
+
+
+class _WorkList(WorkBase):
+    """
+    Base object for state made of other state. The state is kept in a
+    list that is only added to with :meth:`append` and :meth:`extend`.
+    Two objects are only equal if they are the same object.
+    """
+    __slots__ = ('_children',)
+
+    def __init__(self, work_id, parent_work=None):
+        WorkBase.__init__(self, work_id, parent_work=parent_work)
+        self._children = []
+
+    def __iter__(self):
+        return iter(self._children)
+
+    def __len__(self):
+        return len(self._children)
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+    def __contains__(self, work):
+        return work in self._children
+
+    def append(self, p_object):
+        _add_work(self, (p_object,))
+
+    def extend(self, iterable):
+        _add_work(self, list(iterable))
+
+    @property
+    def previous(self):
+        """
+        The state previous to this
+
+        :return: The previous that was run
+        :rtype: Work ParallelWork or WorkSequence or WorkUnit
+        """
+        return _previous_work(self)
+
+
+def _is_empty(work):
+    """
+    Whether the given state is an empty parallel or sequence
+    """
+    return work is not None and not work
+
+
+def _parallel_state(has_ready, has_new, has_done, has_fail):
+    """
+    The state of parallel work with no task in the RUN state, from the
+    states its tasks are in. See :attr:`WorkParallel.state`.
+    """
+    if not has_ready and not has_new and has_fail:
+        return State.FAIL
+    elif (has_ready or has_new) and (has_done or has_fail):
+        return State.RUN
+    elif has_ready or has_new:
+        if not has_ready:
+            return State.NEW
+        return State.READY
+    elif not has_ready and not has_new and has_done:
+        return State.DONE
+    else:
+        return State.UNKNOWN
+
 
 class WorkUnit(WorkBase):
     """
      A single unit of state that is executed.
     """
+    __slots__ = ('_state', '_results', '_inputs', '_index', '_execution_data',
+                 '_template_uid')
 
-    def get_type_name(self):
-            return 'task'
+    TYPE_NAME = 'task'
 
     def __init__(self, parent_work, work_id, state=State.UNKNOWN, inputs=None):
         """
@@ -209,6 +341,8 @@ class WorkUnit(WorkBase):
         self._inputs = inputs
         self._index = 0
         self._execution_data = {}
+        # The parent and the log name of the template found from it
+        self._template_uid = (None, None)
 
     def __str__(self):
         return "Work(id='%s')" % self._id
@@ -223,13 +357,45 @@ class WorkUnit(WorkBase):
 
         :return:
         """
-        if self.parent:
-            for index, work in enumerate(self.parent):
-                if work == self and index > 0:
-                    return self.parent[index - 1]
+        return _previous_work(self)
+
+    def _get_template_uid(self):
+        """
+        The log name of the template this state belongs to. It is found
+        once for each parent, unless the lookup met empty state, which is
+        false until state is added to it.
 
-            return self.parent.previous
-        return None
+        :return: template log name, None if there is no parent
+        :rtype: str or None
+        """
+        parent = self._parent
+        cached_parent, template_uid = self._template_uid
+        if parent is cached_parent:
+            return template_uid
+        template_uid = None
+        changing = False
+        # TODO - research better way to figure out who the parent is
+        # At this point we determine the name of the template which is
+        # one level below the root_work.  This will be revisited with
+        # nested templates
+        if parent:
+            template = parent
+            ancestor = parent.parent
+            if ancestor and ancestor.parent:
+                template = ancestor
+                if ancestor.parent.parent:
+                    template = ancestor.parent
+                else:
+                    changing = _is_empty(ancestor.parent.parent)
+            else:
+                changing = _is_empty(ancestor) or (
+                    ancestor is not None and _is_empty(ancestor.parent))
+            template_uid = template.log_name
+        else:
+            changing = _is_empty(parent)
+        if not changing:
+            self._template_uid = (parent, template_uid)
+        return template_uid
 
     @property
     def execution_data(self):
@@ -268,17 +434,40 @@ class WorkUnit(WorkBase):
     def results(self, value):
         self._results = value
 
-    state = _LogChangeProperty('_state', State.UNKNOWN, log_change_handler_state)
-
-
-
-class WorkParallel(list, WorkBase):
+    @property
+    def state(self):
+        """
+        The state of the execution (UNKNOWN, NEW, READY, RUN, DONE, FAIL)
+        """
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        # Changes are logged, setting the same state again is not
+        if value != self._state:
+            self._state = value
+            state_args = {}
+            log_level = log_change_handler_state(self, state_args, value)
+            # The loggers already queue or buffer what they write, the
+            # record is only built if it will be written
+            if log_enabled(log_level):
+                log_args = {_KW_TASK_UID: self.name}
+                template_uid = self._get_template_uid()
+                if template_uid is not None:
+                    log_args[_KW_TMPL_UID] = template_uid
+                log_args.update(state_args)
+                log_node(log_level, self.name, nodetype=self.TYPE_NAME,
+                         **log_args)
+
+
+class WorkParallel(_WorkList):
     """
     A single unit of Parallel state representing one or more :class:`WorkUnit` that are run in parallel.
     """
 
-    def get_type_name(self):
-        return 'parallel'
+    __slots__ = ('_counts_lock', '_state_counts', '_task_states')
+
+    TYPE_NAME = 'parallel'
 
     def __init__(self, parent_work, work_id):
         """
@@ -290,24 +479,60 @@ class WorkParallel(list, WorkBase):
         :type work_id: WorkName
 
         """
-        #noinspection PyTypeChecker
-        list.__init__(self)
-        WorkBase.__init__(self, work_id, parent_work=parent_work)
+        _WorkList.__init__(self, work_id, parent_work=parent_work)
+        self._init_state_counts()
 
-    @property
-    def previous(self):
+    def _init_state_counts(self):
         """
-
-        :return: The previous that was run
-        :rtype: Work ParallelWork or WorkSequence or WorkUnit
+        Count the states of the :class:`WorkUnit` items, so that
+        :attr:`state` does not look at every task. The counts are kept up
+        to date as tasks are added and change state.
         """
-        if self.parent:
-            for index, work in enumerate(self.parent):
-                if work == self and index > 0:
-                    return self.parent[index - 1]
-
-            return self.parent.previous
-        return None
+        self._counts_lock = threading.Lock()
+        # Number of tasks in each state, and the state of each task by id
+        self._state_counts = {}
+        self._task_states = {}
+        self._work_added(self)
+
+    def __getstate__(self):
+        # The lock cannot be pickled, the counts are made again from the
+        # tasks when unpickled
+        state = {}
+        for cls in WorkParallel.__mro__[1:]:
+            for key in getattr(cls, '__slots__', ()):
+                if hasattr(self, key):
+                    state[key] = getattr(self, key)
+        return state
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+        self._init_state_counts()
+
+    def _work_added(self, work_list):
+        lock = getattr(self, '_counts_lock', None)
+        if lock is None:
+            # Being unpickled, the tasks are counted by __setstate__
+            return
+        with lock:
+            counts, task_states = self._state_counts, self._task_states
+            for work in work_list:
+                if isinstance(work, WorkUnit):
+                    state = work.state
+                    task_states[id(work)] = state
+                    counts[state] = counts.get(state, 0) + 1
+
+    def _child_state_changed(self, work, state):
+        with self._counts_lock:
+            key = id(work)
+            task_states = self._task_states
+            if key not in task_states:
+                # Not added to this parallel work (yet)
+                return
+            counts = self._state_counts
+            counts[task_states[key]] -= 1
+            counts[state] = counts.get(state, 0) + 1
+            task_states[key] = state
 
     @property
     def results(self):
@@ -335,6 +560,18 @@ class WorkParallel(list, WorkBase):
         * UNKNOWN - State is not understood.
 
         """
+        with self._counts_lock:
+            if len(self._task_states) == len(self):
+                # Every item is a counted task
+                counts = self._state_counts
+                if counts.get(State.RUN):
+                    return State.RUN
+                return _parallel_state(counts.get(State.READY, 0) > 0,
+                                       counts.get(State.NEW, 0) > 0,
+                                       counts.get(State.DONE, 0) > 0,
+                                       counts.get(State.FAIL, 0) > 0)
+
+        # Nested work
         has_ready = False
         has_new = False
         has_done = False
@@ -350,45 +587,19 @@ class WorkParallel(list, WorkBase):
                 has_new = True
             if w.state == State.DONE:
                 has_done = True
+        return _parallel_state(has_ready, has_new, has_done, has_fail)
 
-        if not has_ready and not has_new and has_fail:
-            return State.FAIL
-        elif (has_ready or has_new) and (has_done or has_fail):
-            return State.RUN
-        elif has_ready or has_new:
-            if not has_ready:
-                return State.NEW
-            return State.READY
-        elif not has_ready and not has_new and has_done:
-            return State.DONE
-        else:
-            return State.UNKNOWN
 
-    def append(self, p_object):
-        if not isinstance(p_object, WorkBase):
-            raise TigresInternalException(
-                "Must add WorkBase to {} not {}".format(self.__class__.__name__,
-                                                        type(p_object)))
-            # Add self as parent of this state
-        p_object._parent = self
-        list.append(self, p_object)
-
-        if isinstance(p_object, WorkUnit) and p_object.state is State.UNKNOWN:
-            # Only set to NEW if UNKNOWN (this is a new object)
-            # Might want to reconsider this logic
-            p_object.state = State.NEW
-
-
-class WorkSequence(list, WorkBase):
+class WorkSequence(_WorkList):
     """
     A single unit of Sequence state representing one or
         more :class:`WorkUnit` that are run in sequence.
 
     """
 
-    @classmethod
-    def get_type_name(self):
-        return 'sequence'
+    __slots__ = ()
+
+    TYPE_NAME = 'sequence'
 
     def __init__(self, parent_work, work_id):
         """
@@ -400,40 +611,7 @@ class WorkSequence(list, WorkBase):
         :type work_id: WorkName
 
         """
-        #noinspection PyTypeChecker,PyTypeChecker
-        list.__init__(self)
-        WorkBase.__init__(self, work_id, parent_work=parent_work)
-
-    def append(self, p_object):
-        if not isinstance(p_object, WorkBase):
-            raise TigresInternalException(
-                "Must add WorkBase to {} not {}".format(self.__class__.__name__,
-                                                        type(p_object)))
-        # Add self as parent of this state
-        p_object._parent = self
-        list.append(self, p_object)
-        if isinstance(p_object, WorkUnit)  and p_object.state is State.UNKNOWN:
-            # Only set to NEW if UNKNOWN (this is a new object)
-            # Might want to reconsider this logic
-            p_object.state = State.NEW
-
-
-    @property
-    def previous(self):
-        """
-        The state previous to this
-
-        :return: The previous that was run
-        :rtype: Work ParallelWork or WorkSequence or WorkUnit
-        """
-        if self.parent:
-            for index, work in enumerate(self.parent):
-                if work == self and index > 0:
-                    return self.parent[index - 1]
-
-            return self.parent.previous
-        return None
-
+        _WorkList.__init__(self, work_id, parent_work=parent_work)
 
     @property
     def state(self):
@@ -48,19 +48,107 @@ Functions
 from abc import ABCMeta
 from inspect import isclass
 from inspect import getargspec, isfunction
-import inspect
-from uuid import uuid4
-import collections
+import weakref
 
 from tigres.core.monitoring import Program
 from tigres.core.utils import get_metaclass
-from tigres.utils import TigresException
+from tigres.utils import TigresException, get_random_id
 
 
 EXECUTABLE = "EXECUTABLE"
 FUNCTION = "FUNCTION"
 
-LIST_ATTRIBUTES = [p for p in dir(list) if not p.startswith('_')]
+LIST_ATTRIBUTES = tuple(p for p in dir(list) if not p.startswith('_'))
+
+# Number of arguments of callable objects, by object
+_number_args_cache = weakref.WeakKeyDictionary()
+
+# Names of the slots shown by the string forms of Tigres types, by class
+_slot_properties_cache = weakref.WeakKeyDictionary()
+
+# Attributes left out of the string forms of Tigres types
+_HIDDEN_PROPERTIES = ('_tigres_name', '_name', '_unique_name')
+
+
+def _get_program():
+    """
+    The Tigres program. Once the program exists it is read directly from
+    the class, which skips the singleton metaclass call. The instance is not
+    kept here, so a program that has been cleared is never returned.
+
+    :return: the program
+    :rtype: Program
+    """
+    program = getattr(Program, '_instance', None)
+    if program is None:
+        program = Program()
+    return program
+
+
+def _slot_names(cls):
+    """
+    The slot names of the given class and its base classes, base classes first
+
+    :param cls: the class to get the slots for
+    :return: slot names
+    :rtype: list
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(slots)
+    return names
+
+
+def _slot_state(obj):
+    """
+    The values of the slots that are set on the given object, for pickling.
+    Python 2 cannot pickle objects with slots that do not give their state.
+
+    :param obj: the object to get the slot values of
+    :return: values by slot name
+    :rtype: dict
+    """
+    state = {}
+    for name in _slot_names(type(obj)):
+        try:
+            # Not through __getattr__, which may look somewhere else
+            state[name] = object.__getattribute__(obj, name)
+        except AttributeError:
+            pass
+    return state
+
+
+def _slot_properties(cls):
+    """
+    The slot names of the given class that are shown by the string forms of
+    Tigres types. These are fixed for each class so they are found once.
+
+    :param cls: the class to get the slots for
+    :return: slot names
+    :rtype: tuple
+    """
+    names = _slot_properties_cache.get(cls)
+    if names is None:
+        names = tuple(a for a in _slot_names(cls) if a.startswith('_')
+                      and a not in _HIDDEN_PROPERTIES)
+        _slot_properties_cache[cls] = names
+    return names
+
+
+def _as_sequence(items):
+    """
+    Make sure the given items can be iterated more than once
+
+    :param items: list, tuple, other iterable or None
+    :return: the items, as a list if they were some other iterable
+    :rtype: list or tuple
+    """
+    if items is None or isinstance(items, (list, tuple)):
+        return items or ()
+    return list(items)
 
 
 class TigresObject(object):
@@ -72,6 +160,8 @@ class TigresObject(object):
         - tg_attr: Dict of attributes
     """
 
+    __slots__ = ('_target', '_tg_attr')
+
     PREFIX = 'tg_'
     PREFIX_LEN = len(PREFIX)
 
@@ -83,28 +173,37 @@ class TigresObject(object):
         :type name: str
         """
         self._target = obj
-        self._tg_attr = {'name': name, 'oid': str(uuid4()),
-                         'type': obj.__class__.__name__}
-        self._tg_attr.update(kwargs)
+        # Keys are stored with the prefix so that attribute lookup
+        # is a single dictionary access
+        prefix = self.PREFIX
+        self._tg_attr = {prefix + 'name': name, prefix + 'oid': get_random_id(),
+                         prefix + 'type': obj.__class__.__name__}
+        for k, v in kwargs.items():
+            self._tg_attr[prefix + k] = v
+
+    def __getstate__(self):
+        return _slot_state(self)
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
 
     @property
     def tg_attr(self):
         """Return all Tigres special attributes as a dictionary.
         """
-        return self._tg_attr
+        return dict((k[self.PREFIX_LEN:], v) for k, v in self._tg_attr.items())
 
     def __getattr__(self, a_name):
         """Get attribute on target class unless the attribute name
         starts with self.PREFIX; in this case, get the wrapper's value.
         """
-        if a_name.startswith(self.PREFIX):
-            try:
-                r = self._tg_attr[a_name[self.PREFIX_LEN:]]
-            except KeyError:
+        try:
+            return self._tg_attr[a_name]
+        except KeyError:
+            if a_name.startswith(self.PREFIX):
                 raise AttributeError(a_name)
-        else:
-            r = getattr(self._target, a_name)
-        return r
+        return getattr(self._target, a_name)
 
 
 class TigresType(get_metaclass(ABCMeta, 'TigresTypeABCMeta')):
@@ -112,6 +211,10 @@ class TigresType(get_metaclass(ABCMeta, 'TigresTypeABCMeta')):
 
     """
 
+    # Empty so that Task can use slots. The list types cannot
+    # and keep an instance dictionary
+    __slots__ = ()
+
     def __init__(self, name=None):
 
         self._name = name
@@ -123,13 +226,13 @@ class TigresType(get_metaclass(ABCMeta, 'TigresTypeABCMeta')):
             raise TigresException(
                 'name for {} must be a string'.format(self.__class__.__name__))
 
-        if not isinstance(self._name, str):
-            raise TigresException(
-                "The tigres object name must be a string. Got %s of %s" % (
-                    str(self._name), type(self._name)))
-
         self._identifier = None
-        self._identifier = Program().register(self)
+        self._identifier = identifier = _get_program().register(self)
+        # The identifier does not change so the unique name is built once
+        if identifier is None or identifier.index == 0:
+            self._unique_name = self._name
+        else:
+            self._unique_name = "%s-%s" % (identifier.name, identifier.index)
 
     @property
     def name(self):
@@ -137,9 +240,7 @@ class TigresType(get_metaclass(ABCMeta, 'TigresTypeABCMeta')):
 
     @property
     def unique_name(self):
-        if self._identifier.index == 0:
-            return self._name
-        return "%s-%s" % (self._identifier.name, self._identifier.index)
+        return self._unique_name
 
     @classmethod
     def __subclasshook__(cls, c):
@@ -150,38 +251,42 @@ class TigresType(get_metaclass(ABCMeta, 'TigresTypeABCMeta')):
         return NotImplemented
 
     def __subclass_properties(self):
-        return dict(
-            (a, b) for a, b in self.__dict__.items() if a.startswith('_') \
-            and not a in ['_tigres_name', '_name'])
+        try:
+            items = self.__dict__.items()
+        except AttributeError:
+            # Instances with slots do not have a dictionary
+            return [(a, getattr(self, a)) for a in _slot_properties(type(self))
+                    if hasattr(self, a)]
+        return [(a, b) for a, b in items if a.startswith('_')
+                and a not in _HIDDEN_PROPERTIES]
 
     def __repr__(self):
-        repr_str = "{'name':'%s', " % self.name
-        repr_str += "'unique_name':'%s' " % self.unique_name
-        for (k, v) in self.__subclass_properties().items():
+        parts = ["{'name':'%s', " % self.name,
+                 "'unique_name':'%s' " % self.unique_name]
+        for (k, v) in self.__subclass_properties():
             if not k == "_identifier":
-                repr_str += ", '%s':" % k[1:]
                 if isinstance(v, str):
-                    repr_str += "'%s'" % str(v)
+                    parts.append(", '%s':'%s'" % (k[1:], v))
                 elif isclass(v):
-                    repr_str += "%s" % v.__name__
+                    parts.append(", '%s':%s" % (k[1:], v.__name__))
                 else:
-                    repr_str += "%s" % repr(v)
-        repr_str += "}"
-        return repr_str
+                    parts.append(", '%s':%r" % (k[1:], v))
+        parts.append("}")
+        return "".join(parts)
 
     def __str__(self):
-        a_str = "<%s.%s name:%s\n" % (
-            __name__, self.__class__.__name__, self._name )
-        for (k, v) in self.__subclass_properties().items():
+        parts = ["<%s.%s name:%s\n" % (
+            __name__, self.__class__.__name__, self._name )]
+        for (k, v) in self.__subclass_properties():
             if isclass(v):
                 value_str = v.__name__
             else:
                 value_str = repr(v)
-            a_str += "    %s:%s\n" % (k[1:], value_str)
+            parts.append("    %s:%s\n" % (k[1:], value_str))
         if isinstance(self, list):
-            a_str += " %s" % list(self)
-        a_str += ">"
-        return a_str
+            parts.append(" %s" % list(self))
+        parts.append(">")
+        return "".join(parts)
 
 
 class TigresListType(TigresType, list):
@@ -216,8 +321,13 @@ class Task(TigresType):
     >>> from tigres import Task, FUNCTION, EXECUTABLE
     >>> fn_task = Task("abiding", FUNCTION, abide)
     >>> exe_task = Task("more_abiding", EXECUTABLE, "abide.sh")
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(exe_task)).name
+    'more_abiding'
     """
 
+    __slots__ = ('_name', '_identifier', '_unique_name', '_task_type',
+                 '_impl_name', '_input_types', '_env')
 
     def __init__(self, name, task_type, impl_name, input_types=None, env=None):
         """Constructor.
@@ -241,8 +351,10 @@ class Task(TigresType):
         self._env = env
         if task_type is FUNCTION:
             validate_callable(impl_name)
-            module = inspect.getmodule(self._impl_name)
-            if self._impl_name and module and module.__name__.startswith("tigres."):
+            # The module name attribute is enough to recognise a Tigres
+            # callable, there is no need to search for the module itself
+            module_name = getattr(self._impl_name, '__module__', None)
+            if self._impl_name and module_name and module_name.startswith("tigres."):
                 raise ValueError("Task '{}' implementation of {} is not allowed to to be a Tigres callable".format(
                     self._name, self._impl_name.__name__))
             elif not self._impl_name:
@@ -252,6 +364,12 @@ class Task(TigresType):
                 "Invalid value for task. {} must be a tigres.InputTypes or list type".format(
                     type(input_types)))
 
+    def __getstate__(self):
+        return _slot_state(self)
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
 
     @property
     def task_type(self):
@@ -284,12 +402,14 @@ class TaskArray(TigresListType):
         :param tasks: List of tasks in the array. This list is mutable.
         :type tasks: list
         """
-        super(self.__class__, self).__init__(name, tasks)
-        for t in self:
+        # Validate before the list is filled and the array is registered
+        tasks = _as_sequence(tasks)
+        for t in tasks:
             if not is_task(t):
                 raise TypeError(
                     "Invalid value for task array. {} must be a tigres.Task type".format(
                         type(t)))
+        super(self.__class__, self).__init__(name, tasks)
 
 
 class InputValues(TigresListType):
@@ -323,12 +443,14 @@ class InputArray(TigresListType):
         :param values: List of values in the array. This list is mutable.
         :type values: list
         """
-        super(self.__class__, self).__init__(name, values)
-        for t in self:
-            if not is_tigres_object(InputValues, t):
+        # Validate before the list is filled and the array is registered
+        values = _as_sequence(values)
+        for t in values:
+            if not is_list(t):
                 raise TypeError(
                     "Invalid value for input array. {} must be a tigris.InputValues or list type".format(
                         type(t)))
+        super(self.__class__, self).__init__(name, values)
 
 
 class InputTypes(TigresListType):
@@ -348,7 +470,7 @@ class InputTypes(TigresListType):
                                              self.name, self.__types_repr())
 
     def __types_repr(self):
-        return "[" + ', '.join([t.__name__ for t in self]) + "]"
+        return "[%s]" % ', '.join(t.__name__ for t in self)
 
     @property
     def types(self):
@@ -379,15 +501,27 @@ def get_number_args(impl):
 
     validate_callable(impl)
     if isfunction(impl):
-        arg_spec = getargspec(impl)
-        number_args = len(arg_spec.args)
-    else:
-        arg_spec = getargspec(impl.__call__)
-        number_args = len(arg_spec.args) - 1
+        # The positional arguments, same as getargspec(impl).args
+        return impl.__code__.co_argcount
+
+    try:
+        return _number_args_cache[impl]
+    except (KeyError, TypeError):
+        # Not cached yet, or not hashable/weak referenceable
+        pass
+    arg_spec = getargspec(impl.__call__)
+    number_args = len(arg_spec.args) - 1
+    try:
+        _number_args_cache[impl] = number_args
+    except TypeError:
+        pass
     return number_args
 
 
-TASK_ATTRIBUTES = [p for p in dir(Task) if not p.startswith('_')]
+TASK_ATTRIBUTES = tuple(p for p in dir(Task) if not p.startswith('_'))
+
+# Tigres classes that are validated as lists
+_LIST_CLASSES = (InputArray, InputTypes, InputValues, TaskArray)
 
 
 def is_task(obj):
@@ -396,6 +530,8 @@ def is_task(obj):
     :param obj:
     :return: True is it is a `tigres.Task`
     """
+    if isinstance(obj, Task):
+        return True
     for p in TASK_ATTRIBUTES:
         if not hasattr(obj, p):
             return False
@@ -408,6 +544,8 @@ def is_list(obj):
     :param obj:
     :return: True is it is a `list`
     """
+    if isinstance(obj, list):
+        return True
     for p in LIST_ATTRIBUTES:
         if not hasattr(obj, p):
             return False
@@ -422,10 +560,10 @@ def is_tigres_object(tigres_class, tigres_obj):
     :param tigres_obj:
     :return:
     """
-    if tigres_class in [InputArray, InputTypes, InputValues, TaskArray]:
-        return is_list(tigres_obj)
-    elif tigres_class is Task:
+    if tigres_class is Task:
         return is_task(tigres_obj)
+    elif tigres_class in _LIST_CLASSES:
+        return is_list(tigres_obj)
     else:
         raise ValueError(
             'Invalid tigres_class must be InputArray, InputTypes, InputValues, TaskArray or Task')
@@ -472,10 +610,10 @@ def validate_callable(impl):
     >>> validate_callable(my_callable)
     True
     """
-    if isinstance(impl, collections.Callable):
+    if callable(impl):
         return True
     else:
-        raise ValueError("%s is not callable" % str(callable))
+        raise ValueError("%s is not callable" % str(impl))
 
 
 
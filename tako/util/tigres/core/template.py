@@ -22,8 +22,7 @@ Functions
 .. moduleauthor:: Val Hendrix <vhendrix@lbl.gov>
 
 """
-LIST_ATTRIBUTES = [p for p in dir(list) if not p.startswith('_')]
-
+from tigres.core.task import LIST_ATTRIBUTES
 from tigres.core.state.coordination import run_template_sequence, \
     run_template_parallel, run_template_split, \
     run_template_merge, get_results
@@ -74,7 +73,7 @@ def sequence(name, task_array, input_array, env=None):
     return run_template_sequence(name, task_array, input_array, env=env)
 
 
-def parallel(name, task_array, input_array, env=None):
+def parallel(name, task_array, input_array, env=None, execution=None):
     """List of tasks processing their inputs in parallel.
 
     Valid configurations of :code:`task_array` and :code:`input_array` are:
@@ -102,6 +101,9 @@ def parallel(name, task_array, input_array, env=None):
     :param input_array: an array of input data for the specified tasks
     :type input_array: InputArray
     :param env: keyword arguments for the template task execution environment
+    :param execution: execution plugin for the parallel tasks (e.g. :code:`Execution.LOCAL_PROCESS`
+                      for CPU bound functions). Default: the program's execution plugin
+    :type execution: str
     :return: list of task outputs
     :rtype: list
 
@@ -120,11 +122,12 @@ def parallel(name, task_array, input_array, env=None):
     if not name:
         name = parallel.__name__
 
-    return run_template_parallel(name, task_array, input_array, env=env)
+    return run_template_parallel(name, task_array, input_array, env=env,
+                                 execution=execution)
 
 
 def split(name, split_task, split_input_values, task_array, input_array,
-          env=None):
+          env=None, execution=None):
     """ Single 'split' task feeding inputs to a set of parallel tasks. The parallel
     task inputs (:code:`input_array`) must be explicitly defined  with
     :class:`PREVIOUS` or explicit values.
@@ -146,6 +149,8 @@ def split(name, split_task, split_input_values, task_array, input_array,
     :param input_array: array of input values for task array, default PREVIOUS
     :type input_array: InputArray or list
     :param env: keyword arguments for the template task execution environment
+    :param execution: execution plugin for the parallel tasks. Default: the program's execution plugin
+    :type execution: str
     :return: Output of the parallel operation
     :rtype: list(object)
     """
@@ -154,11 +159,11 @@ def split(name, split_task, split_input_values, task_array, input_array,
         name = split.__name__
 
     return run_template_split(name, split_task, split_input_values, task_array,
-                              input_array, env=env)
+                              input_array, env=env, execution=execution)
 
 
 def merge(name, task_array, input_array, merge_task, merge_input_values=None,
-          env=None):
+          env=None, execution=None):
     """ Collect output of parallel tasks
 
     Single 'merge' task is being fed inputs from a set of parallel tasks. The parallel
@@ -184,6 +189,8 @@ def merge(name, task_array, input_array, merge_task, merge_input_values=None,
                                if None.
     :type merge_input_values: InputValues or None
     :param env: keyword arguments for the template task execution environment
+    :param execution: execution plugin for the parallel tasks. Default: the program's execution plugin
+    :type execution: str
     :return: results from the merge task. If the results of the merge task
              is from a python function the output type will be defined by the type returned otherwise
              executable output will be a string.
@@ -195,5 +202,5 @@ def merge(name, task_array, input_array, merge_task, merge_input_values=None,
         name = merge.__name__
 
     return run_template_merge(name, task_array, input_array, merge_task,
-                              merge_input_values, env=env)
+                              merge_input_values, env=env, execution=execution)
 
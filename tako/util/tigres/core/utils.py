@@ -19,24 +19,31 @@ Classes
 .. moduleauthor:: Val Hendrix <vhendrix@lbl.gov>
 
 """
+import multiprocessing
+import os
 import socket
 import sys
+import threading
 
 
 def get_metaclass(cls, name):
-    return cls(name, (object, ), {})
+    # The base declares empty slots so that subclasses may use __slots__
+    return cls(name, (object, ), {'__slots__': ()})
 
 
-def get_str(s):
-    if sys.version_info >= (3, 0, 0):
+# The Python version does not change, so get_str is chosen once
+if sys.version_info >= (3, 0, 0):
+    def get_str(s):
         # for Python 3
         if isinstance(s, bytes):
             s = s.decode('ascii')  # or  s = str(s)[2:-1]
-    else:
+        return s
+else:
+    def get_str(s):
         # for Python 2
         if isinstance(s, unicode):
             s = str(s)
-    return s
+        return s
 
 
 def get_free_port():
@@ -45,16 +52,36 @@ def get_free_port():
     :return:
     """
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.bind(('localhost', 0))
-    _, port = s.getsockname()
-    s.close()
-    return port
+    try:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+    finally:
+        # Closed even if the bind fails
+        s.close()
+
+
+def get_cpu_count():
+    """
+    Get the number of CPUs this process may run on. This is smaller than
+    the number of CPUs in the machine when the process has been pinned
+    (e.g. with taskset or a batch scheduler).
+    :return: number of usable CPUs
+    :rtype: int
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return multiprocessing.cpu_count()
 
 
 # noinspection PyAttributeOutsideInit,PyArgumentList
 class SingletonMeta(type):
     """ Singleton Metaclass for making a singleton class """
 
+    # Held only while the instance is created, reentrant in case the
+    # constructor makes another singleton
+    _lock = threading.RLock()
+
     def __call__(cls, *args, **kwargs):
         """
 
@@ -64,9 +91,16 @@ class SingletonMeta(type):
         :return: The singular instance
         """
 
-        if '_instance' not in cls.__dict__ or cls._instance is None:
-            cls._instance = super(SingletonMeta, cls).__call__(*args, **kwargs)
-        return cls._instance
+        # Once created, the instance is returned without taking the lock
+        instance = cls.__dict__.get('_instance')
+        if instance is None:
+            with SingletonMeta._lock:
+                instance = cls.__dict__.get('_instance')
+                if instance is None:
+                    instance = super(SingletonMeta, cls).__call__(*args,
+                                                                  **kwargs)
+                    cls._instance = instance
+        return instance
 
 
 class TigresInternalException(Exception):
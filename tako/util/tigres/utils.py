@@ -11,6 +11,7 @@
 Functions
 =========
  * :py:func:`get_new_output_file` - Get a new unique output file name.
+ * :py:func:`get_random_id` - Get a new random identifier.
 
 Classes
 =========
@@ -20,8 +21,8 @@ Classes
  * :py:class:`TaskFailure` - Object to be returned in case of failures in task execution
 
 """
+import binascii
 import os
-import uuid
 
 
 class Execution:
@@ -101,24 +102,36 @@ class State:
     def paste(cls, name, state):
         """Combine a name and a state into a single string.
         """
-        return cls._SEP.join((name, state))
+        return name + cls._SEP + state
 
 
-def get_new_output_file(basename="tigres", extension="log"):
+def get_random_id():
+    """Get a new random identifier, 128 random bits as 32 hex digits.
+
+    This reads `os.urandom` directly instead of building a :class:`uuid.UUID`.
+
+    :return: the identifier
+    :rtype: str
+    """
+    return binascii.hexlify(os.urandom(16)).decode('ascii')
+
+
+def get_new_output_file(basename="tigres", extension="log", basedir=None):
     """Get a new unique output file name.
     
     :param basename: Prefix for name
     :type basename: str
     :param extension: File suffix (placed after a '.')
     :type extension: str
+    :param basedir: Directory for the file (Default: the current working directory)
+    :type basedir: str or None
     :return: Name of file (caller should open)
     """
-    basedir = os.getcwd()
-    identity = str(uuid.uuid4())
+    if basedir is None:
+        basedir = os.getcwd()
     if extension[0] == '.':  # some people don't read docs, so
         extension = extension[1:]  # be generous in what we accept
-    return "{bd}/{bn}_{id}.{ext}".format(bd=basedir, bn=basename,
-                                         id=identity, ext=extension)
+    return "%s/%s_%s.%s" % (basedir, basename, get_random_id(), extension)
 
 
 class TigresException(Exception):
@@ -135,8 +148,12 @@ class TaskFailure(object):
     :type error: Exception
     """
 
-    def __init__(self, name='', error=TigresException('Task execution failed')):
+    def __init__(self, name='', error=None):
         self.name = (name if name else 'Result from failed Task execution')
+        # Each failure gets its own default exception, rather than sharing
+        # one created when the class was defined
+        if error is None:
+            error = TigresException('Task execution failed')
         self.error = error
 
     def __str__(self):